@@ -0,0 +1,115 @@
+"""
+Benchmark the single-pass section extractor against the original regex extractors.
+
+Converts every PDF in input/ once, then times both implementations on each
+document, on one large document made by concatenating all of them (--repeat
+times), and on that document with its K2_IZ markers removed. Exits with
+status 1 if any output differs.
+
+    python benchmarks/bench_sections.py [--repeat 20] [--rounds 5]
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from sections import detect_language, iter_outcomes  # noqa: E402
+
+
+# === ORIGINAL IMPLEMENTATIONS (reference) ===
+def legacy_extract_polish_content(text):
+    syllabus_sections = re.findall(r'Przedmiotowe efekty uczenia się\s*(.*?)(?=\nTreści programowe zapewniające uzyskanie efektów uczenia się|\Z)', text, re.DOTALL)
+
+    extracted_data = []
+    for section in syllabus_sections:
+        contents = re.findall(r'PEU[ _]?[WUK]\d+\s*(.*?)(?=\s*K2[ _]?IZ)', section, re.DOTALL)
+        for content in contents:
+            cleaned_content = content.strip().strip('",')
+            cleaned_content = ' '.join(cleaned_content.split())
+
+            if cleaned_content:
+                extracted_data.append(cleaned_content)
+
+    return "\n\n".join(extracted_data)
+
+
+def legacy_extract_english_content(text):
+    learning_outcomes_sections = re.findall(r"Subject's learning outcomes\s*(.*?)(?=\nProgram content ensuring learning outcomes|\Z)", text, re.DOTALL)
+
+    extracted_data = []
+    for section in learning_outcomes_sections:
+        contents = re.findall(r"PEU_\w+\d+\s*(.*?)(?=\s*K2[ _]?IZ)", section, re.DOTALL)
+        for content in contents:
+            cleaned_content = content.strip().strip('",')
+            cleaned_content = ' '.join(cleaned_content.split())
+
+            if cleaned_content:
+                extracted_data.append(cleaned_content)
+
+    return "\n\n".join(extracted_data)
+
+
+def legacy_extract(text):
+    if "Przedmiotowe efekty uczenia się" in text:
+        return legacy_extract_polish_content(text)
+    elif "Subject's learning outcomes" in text:
+        return legacy_extract_english_content(text)
+    return text
+
+
+def single_pass_extract(text):
+    language = detect_language(text)
+    if language is None:
+        return text
+    return "\n\n".join(iter_outcomes(text, language))
+
+
+# === BENCHMARK ===
+def best_time(fn, text, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", type=Path, default=ROOT / "input", help="Directory with syllabus PDFs")
+    parser.add_argument("--repeat", type=int, default=20, help="Copies of each document in the combined document")
+    parser.add_argument("--rounds", type=int, default=5, help="Timing rounds per case (best is reported)")
+    args = parser.parse_args()
+
+    from markitdown import MarkItDown
+
+    md = MarkItDown()
+    documents = {pdf.name: md.convert(pdf).text_content for pdf in sorted(args.input.glob("*.pdf"))}
+    if not documents:
+        print(f"No PDFs found in {args.input}")
+        return 1
+    # A large combined PDF: Polish and English syllabi concatenated many times
+    combined = "\n".join(documents.values()) * args.repeat
+    documents[f"combined x{args.repeat}"] = combined
+    # Worst case for the lazy regexes: outcome rows whose K2_IZ column is missing
+    documents[f"combined x{args.repeat}, no K2_IZ"] = combined.replace("K2", "K3")
+
+    print(f"{'document':<50} {'chars':>10} {'regex (s)':>10} {'single (s)':>11} {'speedup':>8}  identical")
+    all_identical = True
+    for name, text in documents.items():
+        legacy_time, legacy_result = best_time(legacy_extract, text, args.rounds)
+        new_time, new_result = best_time(single_pass_extract, text, args.rounds)
+        identical = legacy_result == new_result
+        all_identical &= identical
+        print(f"{name:<50} {len(text):>10} {legacy_time:>10.4f} {new_time:>11.4f} "
+              f"{legacy_time / max(new_time, 1e-9):>7.1f}x  {'yes' if identical else 'NO'}")
+
+    return 0 if all_identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Check compare.py's matching against the original per-job loop.
+
+Generates a synthetic job corpus and study skills, computes the original
+implementation's outputs (one model.encode and util.cos_sim per posting) with
+the stand-in model (synthetic.build_standin_model), then runs compare.py on
+the same data in several configurations and compares every output:
+
+- dense: the default run
+- thresholds: --thresholds (one set of outputs per threshold)
+- workers: --workers 2 with small shards
+- index exact: --index exact --top-k N, N = number of study skills
+- incremental: two --incremental runs sharing a result store, the second on a
+  corpus with changed, removed and added postings
+
+Exits with status 1 if any output differs.
+
+    python benchmarks/check_matching.py [--jobs 500] [--thresholds 0.4,0.5,0.6]
+"""
+import argparse
+import csv
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import synthetic  # noqa: E402
+from compare import get_job_skill_texts, load_study_skills  # noqa: E402
+
+
+# === ORIGINAL IMPLEMENTATION (reference) ===
+def legacy_compare(model, jobs, study_skills, threshold):
+    """The original compare.py loop. Returns its result rows, study-skill match counts and job-skill counter."""
+    from sentence_transformers import util
+
+    study_embeddings = model.encode(study_skills, convert_to_tensor=True, batch_size=64, show_progress_bar=False)
+
+    results = []
+    study_skill_match_counts = [0] * len(study_skills)
+    job_skill_counter = {}
+    for job in jobs:
+        job_skill_texts = get_job_skill_texts(job)
+        for skill in job_skill_texts:
+            job_skill_counter[skill] = job_skill_counter.get(skill, 0) + 1
+
+        if not job_skill_texts:
+            results.append([job.get("title", ""), job.get("company", ""), 0, 0, 0.0])
+            continue
+
+        job_embeddings = model.encode(job_skill_texts, convert_to_tensor=True, batch_size=64, show_progress_bar=False)
+        similarity_matrix = util.cos_sim(job_embeddings, study_embeddings)
+        match_counts = (similarity_matrix >= threshold).any(dim=1).sum().item()
+        study_skill_matches = (similarity_matrix >= threshold).any(dim=0).cpu().numpy()
+        study_skill_match_counts = [a + int(b) for a, b in zip(study_skill_match_counts, study_skill_matches)]
+        results.append([job.get("title", ""), job.get("company", ""), match_counts, len(job_skill_texts),
+                        match_counts / len(job_skill_texts)])
+
+    return results, study_skill_match_counts, job_skill_counter
+
+
+# === compare.py OUTPUTS ===
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))[1:]
+
+
+def read_outputs(run_dir, suffix):
+    """compare.py's outputs for one threshold, in the same shape as legacy_compare's."""
+    results = [[title, company, int(matched), int(total), float(ratio)]
+               for title, company, matched, total, ratio in read_csv(run_dir / f"job_skill_matches{suffix}.csv")]
+    # Sorted by count only, so the order of equal counts is not part of the output
+    study_counts = sorted((skill, int(count)) for skill, count in read_csv(run_dir / f"study_skill_match_counts{suffix}.csv"))
+    job_skill_counter = {skill: int(frequency) for skill, frequency in read_csv(run_dir / "job_skill_frequencies.csv")}
+    return results, study_counts, job_skill_counter
+
+
+def expected_outputs(reference, study_skills):
+    results, study_skill_match_counts, job_skill_counter = reference
+    return results, sorted(zip(study_skills, study_skill_match_counts)), job_skill_counter
+
+
+def differences(expected, actual):
+    """Names of the outputs that differ, with the first differing posting for the result rows."""
+    found = []
+    for name, want, got in zip(("job_skill_matches", "study_skill_match_counts", "job_skill_frequencies"), expected, actual):
+        if want == got:
+            continue
+        if name == "job_skill_matches":
+            if len(want) != len(got):
+                found.append(f"{name}: {len(got)} rows, expected {len(want)}")
+            else:
+                row = next(i for i, (a, b) in enumerate(zip(want, got)) if a != b)
+                found.append(f"{name}: row {row} is {got[row]}, expected {want[row]}")
+        else:
+            found.append(name)
+    return found
+
+
+def run_compare(run_dir, model_dir, args):
+    start = time.perf_counter()
+    with open(run_dir / "compare.log", "a", encoding="utf-8") as log:
+        completed = subprocess.run([sys.executable, str(ROOT / "compare.py"), "--model", str(model_dir), *args],
+                                   cwd=run_dir, stdout=log, stderr=subprocess.STDOUT)
+    if completed.returncode != 0:
+        raise SystemExit(f"compare.py {' '.join(args)} failed with status {completed.returncode}; see {run_dir / 'compare.log'}")
+    return time.perf_counter() - start
+
+
+def write_corpus(path, jobs):
+    with open(path, "w", encoding="utf-8") as f:
+        for job in jobs:
+            f.write(json.dumps(job, ensure_ascii=False))
+            f.write("\n")
+
+
+def next_corpus(jobs, seed):
+    """The corpus of a later scrape: some postings changed, some removed, new ones added."""
+    rng = random.Random(seed)
+    changed = []
+    for job in jobs:
+        if rng.random() < 0.1:
+            continue
+        if rng.random() < 0.1:
+            job = dict(job, requirements=job["requirements"][:-1], technologies_optional="No optional technologies")
+        changed.append(job)
+    added = list(synthetic.iter_jobs(len(jobs) // 5, seed + 1))
+    for i, job in enumerate(added):
+        job["url"] += f"/new/{i}"
+    return changed + added
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=500, help="Postings in the synthetic corpus")
+    parser.add_argument("--documents", type=int, default=5, help="Synthetic syllabi whose skills are the study skills")
+    parser.add_argument("--thresholds", default="0.4,0.5,0.6", help="Thresholds checked with --thresholds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", type=Path, default=ROOT / "benchmarks" / "data", help="Where the stand-in model is cached")
+    parser.add_argument("--keep", action="store_true", help="Keep the run directories and print their location")
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    from parse_to_json import SkillDeduplicator
+
+    from compare import SIMILARITY_THRESHOLD
+
+    thresholds = [float(t) for t in args.thresholds.split(",")]
+    args.data_dir.mkdir(parents=True, exist_ok=True)
+    model_dir = synthetic.build_standin_model(args.data_dir / f"standin_model_{synthetic.STANDIN_DIM}")
+    model = SentenceTransformer(str(model_dir), device="cpu")
+
+    work_dir = Path(tempfile.mkdtemp(prefix="check_matching_"))
+    skills_path = work_dir / "extracted_skills.json"
+    deduplicator = SkillDeduplicator()
+    for skills in synthetic.iter_extracted_skills(args.documents, args.seed):
+        deduplicator.add_extracted_skills(skills)
+    skills_path.write_text(json.dumps(deduplicator.get_deduplicated_skills().model_dump(), ensure_ascii=False), encoding="utf-8")
+    study_skills = load_study_skills([skills_path])
+    jobs = list(synthetic.iter_jobs(args.jobs, args.seed))
+    later_jobs = next_corpus(jobs, args.seed)
+
+    # (name, compare.py arguments per step, corpus per step, thresholds of the outputs)
+    runs = [
+        ("dense", [[]], [jobs], None),
+        ("thresholds", [["--thresholds", args.thresholds]], [jobs], thresholds),
+        ("workers", [["--workers", "2", "--shard-size", str(max(1, args.jobs // 7))]], [jobs], None),
+        ("index exact", [["--index", "exact", "--top-k", str(len(study_skills))]], [jobs], None),
+        ("incremental", [["--incremental"], ["--incremental"]], [jobs, later_jobs], None),
+    ]
+    references = {}
+
+    print(f"{len(jobs)} postings, {len(study_skills)} study skills")
+    print(f"{'run':<14} {'threshold':>9} {'seconds':>8}  identical")
+    all_identical = True
+    try:
+        for name, steps, corpora, run_thresholds in runs:
+            run_dir = work_dir / name.replace(" ", "_")
+            run_dir.mkdir()
+            shutil.copy(skills_path, run_dir / "extracted_skills.json")
+            seconds = 0.0
+            for step_args, corpus in zip(steps, corpora):
+                write_corpus(run_dir / "job_descriptions.json", corpus)
+                seconds += run_compare(run_dir, model_dir, step_args)
+
+            for threshold in run_thresholds or [SIMILARITY_THRESHOLD]:
+                key = (id(corpus), threshold)
+                if key not in references:
+                    references[key] = expected_outputs(legacy_compare(model, corpus, study_skills, threshold), study_skills)
+                found = differences(references[key], read_outputs(run_dir, f"_t{threshold:g}" if run_thresholds else ""))
+                all_identical &= not found
+                print(f"{name:<14} {threshold:>9g} {seconds:>8.2f}  {'yes' if not found else 'NO'}")
+                for difference in found:
+                    print(f"    {difference}")
+    finally:
+        if args.keep:
+            print(f"Run directories kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return 0 if all_identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+A local stand-in for the OpenAI chat-completions API, so the extraction stage runs offline.
+
+Answers every request with the synthetic skills mentioned in the prompt
+(synthetic.skills_in_text) as structured output, with one result per document
+for packed requests. The latency per request and a share of 429 responses can
+be configured to exercise concurrency and retries.
+
+    with FakeLLM(latency=0.2) as llm:
+        subprocess.run([sys.executable, "parse_to_json.py", "--base-url", llm.base_url])
+"""
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from synthetic import skills_in_text
+
+DOCUMENT = re.compile(r'<document id="\d+">\n(.*?)\n</document>', re.DOTALL)
+
+
+class FakeLLM:
+    def __init__(self, latency: float = 0.0, rate_limit_every: int = 0, seed: int = 0, context_tokens: int = 0):
+        """
+        Args:
+            latency: Seconds each successful response is delayed
+            rate_limit_every: Answer every n-th request with 429 (0: never)
+            seed: Seed for the spelling of the returned skill names
+            context_tokens: Reject prompts longer than this many tokens with 400, like a full context window (0: never)
+        """
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.seed = seed
+        self.context_tokens = context_tokens
+        self.requests = 0
+        self._counter = itertools.count(1)
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, body: dict):
+        """Return (status, headers, payload) for one chat-completions request."""
+        n = next(self._counter)
+        self.requests = n
+        if self.rate_limit_every and n % self.rate_limit_every == 0:
+            return 429, {"Retry-After": "0"}, {"error": {"message": "Rate limit reached", "type": "rate_limit"}}
+        prompt = "\n".join(message["content"] for message in body["messages"])
+        if self.context_tokens and len(prompt) // 4 > self.context_tokens:
+            return 400, {}, {"error": {"message": f"This model's maximum context length is {self.context_tokens} tokens",
+                                       "type": "invalid_request_error", "code": "context_length_exceeded"}}
+        time.sleep(self.latency)
+        user_prompt = body["messages"][-1]["content"]
+        if body["response_format"]["json_schema"]["name"] == "ExtractedSkillsBatch":
+            # Packed request: one result per <document> block
+            documents = [skills_in_text(text, self.seed).model_dump() for text in DOCUMENT.findall(user_prompt)]
+            content = json.dumps({"documents": documents})
+        else:
+            content = skills_in_text(user_prompt, self.seed).model_dump_json()
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        return 200, {}, {
+            "id": f"chatcmpl-{n}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content, "refusal": None}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def _handler(self):
+        llm = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                status, headers, payload = llm.respond(body)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
@@ -0,0 +1,385 @@
+"""
+Offline benchmark of the whole pipeline on synthetic data.
+
+Stages:
+- sections: main.py's learning-outcome extractors on synthetic syllabus text
+- extract: parse_to_json.py against a local fake LLM (benchmarks/fake_llm.py)
+- dedup: SkillDeduplicator.add_extracted_skills and merge_similar on many documents
+- compare: compare.py on synthetic job corpora of each --sizes
+- serve: service.py's request latency (one client) and throughput (--serve-clients concurrent clients)
+
+parse_to_json.py and compare.py run as subprocesses with --profile, so their
+stage timers, counters and peak memory come from the same profiling layer as a
+normal run. Embeddings come from a tiny local stand-in model
+(synthetic.build_standin_model), so nothing is downloaded. The results, with
+the commit and environment they were measured on, are written to one JSON file;
+--baseline compares them with an earlier file.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 100k,1m --stages compare --compare-args="--workers 4"
+    python benchmarks/run_benchmarks.py --baseline benchmarks/results/<earlier run>.json
+
+Generated job corpora and the stand-in model are kept in --data-dir and reused.
+"""
+import argparse
+import json
+import os
+import platform
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import synthetic  # noqa: E402
+from fake_llm import FakeLLM  # noqa: E402
+
+STAGES = ["sections", "extract", "dedup", "compare", "serve"]
+DEFAULT_SIZES = "1k,10k"
+DATA_DIR = ROOT / "benchmarks" / "data"
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+PACKAGES = ["numpy", "torch", "sentence-transformers", "pandas", "openai", "pydantic"]
+
+
+def parse_size(value):
+    """'10k' -> 10000, '1m' -> 1000000."""
+    value = value.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * scale)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated stages to run (default: all of {','.join(STAGES)})")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Job corpus sizes for compare, e.g. 1k,10k,100k,1m (default: {DEFAULT_SIZES})")
+    parser.add_argument("--syllabi", type=int, default=20, help="Synthetic syllabus documents, alternating Polish and English (default: 20)")
+    parser.add_argument("--dedup-documents", type=int, default=10000, help="Extraction results fed to SkillDeduplicator (default: 10000)")
+    parser.add_argument("--rounds", type=int, default=3, help="Timing rounds for the in-process stages; the best is reported (default: 3)")
+    parser.add_argument("--concurrency", type=int, default=4, help="parse_to_json.py --concurrency (default: 4)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the fake LLM takes per response (default: 0)")
+    parser.add_argument("--llm-rate-limit-every", type=int, default=0, help="Fake LLM answers every n-th request with 429 (default: never)")
+    parser.add_argument("--llm-context-tokens", type=int, default=0,
+                        help="Fake LLM rejects prompts longer than this many tokens (default: no limit)")
+    parser.add_argument("--extract-args", default="", help="Extra parse_to_json.py arguments, e.g. --extract-args=\"--pack 1\"")
+    parser.add_argument("--compare-args", default="", help="Extra compare.py arguments, e.g. --compare-args=\"--workers 4 --precision int8\"")
+    parser.add_argument("--serve-requests", type=int, default=2000, help="Single-posting requests sent to service.py (default: 2000)")
+    parser.add_argument("--serve-clients", type=int, default=16, help="Concurrent clients in the service throughput run (default: 16)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of all synthetic data (default: 0)")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help="Where generated corpora and the stand-in model are cached")
+    parser.add_argument("--output", type=Path, default=None, help="Results file (default: benchmarks/results/<time>_<commit>.json)")
+    parser.add_argument("--baseline", type=Path, default=None, help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+    args.stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    args.sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    return args
+
+
+# === ENVIRONMENT ===
+def git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """Commit, interpreter, machine and package versions the results were measured with."""
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+# === HELPERS ===
+def best_of(rounds, fn):
+    """Run fn rounds times; return the fastest duration and the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_script(script, args, cwd, env=None):
+    """
+    Run one of the pipeline scripts with --profile.
+
+    Returns:
+        tuple: (its profiling report, wall time of the whole process including interpreter start-up and imports)
+    """
+    report_path = Path(cwd) / "profile.json"
+    log_path = Path(cwd) / f"{Path(script).stem}.log"
+    command = [sys.executable, str(ROOT / script), *args, "--profile", str(report_path)]
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        completed = subprocess.run(command, cwd=cwd, stdout=log, stderr=subprocess.STDOUT,
+                                   env={**os.environ, "TQDM_DISABLE": "1", **(env or {})})
+    process_seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        tail = log_path.read_text(encoding="utf-8", errors="replace").splitlines()[-30:]
+        raise SystemExit(f"{' '.join(command)} failed with exit code {completed.returncode}:\n" + "\n".join(tail))
+    return json.loads(report_path.read_text(encoding="utf-8")), process_seconds
+
+
+def profiled(record, report, process_seconds):
+    """Add the wall time, memory, timers and counters of a --profile report to a result record."""
+    record.update(
+        seconds=report["wall_s"],
+        process_seconds=process_seconds,
+        peak_rss_mb=report["peak_rss_mb"],
+        worker_peak_rss_mb=report["worker_peak_rss_mb"],
+        stages={name: {"count": timer["count"], "total_s": timer["total_s"]} for name, timer in report["timers"].items()},
+        counters=report["counters"],
+    )
+    return record
+
+
+def extract_outcomes(text):
+    """What main.convert_pdf() does with a converted PDF's text."""
+    from main import extract_english_content, extract_polish_content
+    from sections import detect_language
+
+    language = detect_language(text)
+    if language == "pl":
+        return extract_polish_content(text)
+    if language == "en":
+        return extract_english_content(text)
+    return text
+
+
+def write_study_skills(documents, path, seed):
+    """Write extracted_skills.json as the fake LLM and SkillDeduplicator would produce it."""
+    from parse_to_json import SkillDeduplicator
+
+    deduplicator = SkillDeduplicator()
+    for markdown in documents.values():
+        deduplicator.add_extracted_skills(synthetic.skills_in_text(markdown, seed))
+    skills = deduplicator.get_deduplicated_skills()
+    path.write_text(json.dumps(skills.model_dump(), ensure_ascii=False, indent=2), encoding="utf-8")
+    return len(skills.technologies) + len(skills.soft_skills)
+
+
+# === STAGES ===
+def bench_sections(args, syllabi):
+    chars = sum(len(text) for text in syllabi.values())
+    seconds, _ = best_of(args.rounds, lambda: [extract_outcomes(text) for text in syllabi.values()])
+    return [{"name": "sections", "size": len(syllabi), "seconds": seconds, "chars": chars,
+             "throughput": chars / seconds, "unit": "chars/s"}]
+
+
+def bench_extract(args, pipeline_dir):
+    with FakeLLM(args.llm_latency, args.llm_rate_limit_every, args.seed, args.llm_context_tokens) as llm:
+        report, process_seconds = run_script("parse_to_json.py", ["--base-url", llm.base_url, "--no-cache", "--concurrency", str(args.concurrency),
+                                                                  *shlex.split(args.extract_args)],
+                            pipeline_dir, {"OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "offline")})
+    documents = len(list((pipeline_dir / "output").glob("*.md")))
+    record = profiled({"name": "extract", "size": documents, "extract_args": args.extract_args}, report, process_seconds)
+    record.update(throughput=documents / record["seconds"], unit="documents/s")
+    return [record]
+
+
+def bench_dedup(args, model_dir):
+    from parse_to_json import SkillDeduplicator
+
+    documents = list(synthetic.iter_extracted_skills(args.dedup_documents, args.seed))
+
+    def add_all():
+        deduplicator = SkillDeduplicator()
+        for skills in documents:
+            deduplicator.add_extracted_skills(skills)
+        return deduplicator
+
+    seconds, deduplicator = best_of(args.rounds, add_all)
+    unique = len(deduplicator.unique_technologies) + len(deduplicator.unique_soft_skills)
+    records = [{"name": "dedup", "size": len(documents), "seconds": seconds, "unique_skills": unique,
+                "throughput": len(documents) / seconds, "unit": "documents/s"}]
+
+    from sentence_transformers import SentenceTransformer
+    from matching import normalize_rows
+
+    model = SentenceTransformer(str(model_dir), device="cpu")
+    encode = lambda names: normalize_rows(model.encode(names, batch_size=512, show_progress_bar=False))  # noqa: E731
+    start = time.perf_counter()
+    deduplicator.merge_similar(encode)
+    seconds = time.perf_counter() - start
+    merged = len(deduplicator.unique_technologies) + len(deduplicator.unique_soft_skills)
+    records.append({"name": "dedup.merge_similar", "size": unique, "seconds": seconds, "merged_skills": unique - merged,
+                    "throughput": unique / seconds, "unit": "skills/s"})
+    return records
+
+
+def job_corpus(args, size):
+    """Path of the synthetic corpus of size postings, generating it on first use."""
+    path = args.data_dir / f"jobs_{size}_seed{args.seed}.jsonl"
+    if not path.exists():
+        print(f"Generating {size} job postings -> {path}")
+        tmp = path.with_suffix(".tmp")
+        synthetic.write_jobs(tmp, size, args.seed)
+        tmp.replace(path)
+    return path
+
+
+def bench_compare(args, size, model_dir, study_skills_path, work_dir):
+    corpus = job_corpus(args, size)
+    run_dir = work_dir / f"compare_{size}"
+    run_dir.mkdir()
+    try:
+        (run_dir / "job_descriptions.json").symlink_to(corpus)
+    except OSError:
+        shutil.copy(corpus, run_dir / "job_descriptions.json")
+    shutil.copy(study_skills_path, run_dir / "extracted_skills.json")
+
+    report, process_seconds = run_script("compare.py", ["--model", str(model_dir), *shlex.split(args.compare_args)], run_dir)
+    record = profiled({"name": "compare", "size": size, "compare_args": args.compare_args}, report, process_seconds)
+    record.update(throughput=size / record["seconds"], unit="jobs/s")
+    return [record]
+
+
+def percentile_ms(latencies, q):
+    import numpy as np
+
+    return float(np.percentile(latencies, q)) * 1000 if latencies else 0.0
+
+
+def bench_serve(args, model_dir, study_skills_path, work_dir):
+    """Latency of service.py with one client, then throughput with --serve-clients clients posting concurrently."""
+    import http.client
+    import threading
+
+    from job_stream import iter_jobs
+    from service import MatchService, MicroBatcher, make_server
+
+    jobs = [json.dumps(job).encode("utf-8") for job in iter_jobs(job_corpus(args, 1000))]
+    service = MatchService([study_skills_path], str(model_dir), cache_dir=work_dir / "serve_cache")
+    records = []
+    for name, clients in (("serve.latency", 1), ("serve.concurrent", args.serve_clients)):
+        batcher = MicroBatcher(service.match)
+        server = make_server(service, batcher, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        latencies = [[] for _ in range(clients)]
+
+        def client(i):
+            connection = http.client.HTTPConnection(host, port)
+            for n in range(i, args.serve_requests, clients):
+                start = time.perf_counter()
+                connection.request("POST", "/match", jobs[n % len(jobs)], {"Content-Type": "application/json"})
+                response = connection.getresponse()
+                response.read()
+                latencies[i].append(time.perf_counter() - start)
+                if response.status != 200:
+                    raise SystemExit(f"service.py answered {response.status}")
+            connection.close()
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+        server.shutdown()
+        server.server_close()
+        batcher.close()
+
+        all_latencies = [latency for client_latencies in latencies for latency in client_latencies]
+        records.append({"name": name, "size": len(all_latencies), "seconds": seconds, "clients": clients,
+                        "p50_ms": percentile_ms(all_latencies, 50), "p95_ms": percentile_ms(all_latencies, 95),
+                        "mean_batch_jobs": batcher.jobs / max(batcher.batches, 1),
+                        "throughput": len(all_latencies) / seconds, "unit": "jobs/s"})
+    return records
+
+
+# === REPORTING ===
+def print_results(results, baseline=None):
+    previous = {}
+    if baseline is not None:
+        for record in json.loads(baseline.read_text(encoding="utf-8"))["results"]:
+            previous[record["name"], record["size"]] = record
+    print(f"\n{'benchmark':<22} {'size':>9} {'seconds':>10} {'throughput':>22} {'peak RSS MB':>12}"
+          + (f" {'baseline s':>11} {'speedup':>8}" if previous else ""))
+    for record in results:
+        line = (f"{record['name']:<22} {record['size']:>9} {record['seconds']:>10.3f} "
+                f"{record['throughput']:>12.1f} {record['unit']:<9} {record.get('peak_rss_mb', ''):>12}")
+        old = previous.get((record["name"], record["size"]))
+        if old is not None:
+            line += f" {old['seconds']:>11.3f} {old['seconds'] / max(record['seconds'], 1e-9):>7.2f}x"
+        if "p50_ms" in record:
+            line += f"  p50 {record['p50_ms']:.1f} ms, p95 {record['p95_ms']:.1f} ms, {record['mean_batch_jobs']:.1f} jobs/batch"
+        print(line)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.data_dir.mkdir(parents=True, exist_ok=True)
+    env = environment()
+    model_dir = synthetic.build_standin_model(args.data_dir / f"standin_model_{synthetic.STANDIN_DIM}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="ala_bench_") as tmp:
+        work_dir = Path(tmp)
+        pipeline_dir = work_dir / "pipeline"
+        (pipeline_dir / "output").mkdir(parents=True)
+
+        # Synthetic syllabi, and their learning outcomes as main.py would write them to output/
+        syllabi = {f"syllabus_{i:03d}_{language}": synthetic.syllabus_document(i, language, seed=args.seed)
+                   for i, language in ((i, "pl" if i % 2 == 0 else "en") for i in range(args.syllabi))}
+        markdown = {name: extract_outcomes(text) for name, text in syllabi.items()}
+        for name, text in markdown.items():
+            (pipeline_dir / "output" / f"{name}.md").write_text(text, encoding="utf-8")
+        study_skills_path = work_dir / "extracted_skills.json"
+        study_skills = write_study_skills(markdown, study_skills_path, args.seed)
+
+        if "sections" in args.stages:
+            print(f"Benchmarking section extraction on {len(syllabi)} syllabi...")
+            results += bench_sections(args, syllabi)
+        if "extract" in args.stages:
+            print(f"Benchmarking parse_to_json.py on {len(markdown)} documents with the fake LLM...")
+            results += bench_extract(args, pipeline_dir)
+        if "dedup" in args.stages:
+            print(f"Benchmarking SkillDeduplicator on {args.dedup_documents} documents...")
+            results += bench_dedup(args, model_dir)
+        if "compare" in args.stages:
+            for size in args.sizes:
+                print(f"Benchmarking compare.py on {size} job postings and {study_skills} study skills...")
+                results += bench_compare(args, size, model_dir, study_skills_path, work_dir)
+        if "serve" in args.stages:
+            print(f"Benchmarking service.py with {args.serve_requests} requests against {study_skills} study skills...")
+            results += bench_serve(args, model_dir, study_skills_path, work_dir)
+
+    output = args.output or RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{(env['commit'] or 'unknown')[:8]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    config = {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()}
+    output.write_text(json.dumps({"environment": env, "config": config, "results": results}, indent=2), encoding="utf-8")
+
+    print_results(results, args.baseline)
+    print(f"\nResults saved to: {output}")
+
+
+if __name__ == "__main__":
+    main()
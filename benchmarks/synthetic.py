@@ -0,0 +1,315 @@
+"""
+Deterministic synthetic inputs for the benchmarks.
+
+- iter_jobs() / write_jobs(): job postings shaped like the scraper output
+- syllabus_document(): raw converted syllabus text, as main.py's section extractors see it
+- iter_extracted_skills(): per-document LLM results, as SkillDeduplicator receives them
+- skills_in_text(): the skills a syllabus mentions, used by the fake LLM
+- build_standin_model(): a tiny local sentence-transformers model over the generators' vocabulary
+
+Everything is derived from a seed, so the same size and seed produce the same
+data on every machine and every commit.
+"""
+import json
+import random
+import string
+import sys
+from itertools import accumulate
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from models import ExtractedSkills, SoftSkill, TechnologySkill  # noqa: E402
+
+ZIPF_EXPONENT = 1.1  # Skew of technology and company popularity
+COMPANIES = 5000
+SUBJECTS_PER_DOCUMENT = 40  # The sample syllabi describe 40-50 subjects each
+STANDIN_DIM = 384  # Same as the default model, so matching costs are realistic
+
+# === VOCABULARY ===
+TECHNOLOGIES = {
+    "Programming Language": [
+        "Python", "Java", "JavaScript", "TypeScript", "C#", "C++", "C", "Go", "Rust", "Kotlin", "Scala", "PHP",
+        "Ruby", "Swift", "R", "MATLAB", "SQL", "Bash", "PowerShell", "Dart", "Elixir", "Haskell", "Julia", "Perl",
+        "Groovy", "VBA", "ABAP", "COBOL", "Lua", "Objective-C",
+    ],
+    "Framework": [
+        "Spring", "Spring Boot", "Django", "Flask", "FastAPI", "React", "Angular", "Vue.js", "Next.js", "Node.js",
+        ".NET", "ASP.NET", "Hibernate", "Express", "Laravel", "Symfony", "Ruby on Rails", "Flutter", "Qt",
+        "TensorFlow", "PyTorch", "scikit-learn", "Pandas", "NumPy", "Spark", "Hadoop", "Airflow", "dbt", "Selenium",
+        "Cypress", "Playwright", "JUnit", "pytest", "Jest", "Redux", "RxJS", "GraphQL", "gRPC", "Kafka Streams",
+    ],
+    "Database": [
+        "PostgreSQL", "MySQL", "Oracle", "MS SQL Server", "MongoDB", "Redis", "Elasticsearch", "Cassandra",
+        "DynamoDB", "Snowflake", "BigQuery", "Databricks", "SQLite", "Neo4j", "ClickHouse", "MariaDB",
+    ],
+    "Cloud Platform": ["AWS", "Azure", "Google Cloud Platform", "OpenShift", "Heroku", "Cloudflare", "OCI"],
+    "DevOps Tool": [
+        "Docker", "Kubernetes", "Terraform", "Ansible", "Jenkins", "GitLab CI", "GitHub Actions", "Helm", "Argo CD",
+        "Prometheus", "Grafana", "ELK", "Git", "Linux", "Nginx", "Maven", "Gradle", "SonarQube", "Vault",
+    ],
+    "Analytics Tool": [
+        "Power BI", "Tableau", "Excel", "Looker", "Qlik", "SAS", "SPSS", "SAP", "Salesforce", "Jira", "Confluence",
+        "Figma", "UML", "BPMN", "ETL", "Data Warehouse", "Machine Learning", "Deep Learning", "NLP", "Computer Vision",
+        "REST API", "Microservices", "CI/CD", "Agile", "Scrum", "Kanban", "TDD", "DDD", "OOP", "Design Patterns",
+    ],
+}
+TECH_NAMES = [name for names in TECHNOLOGIES.values() for name in names]
+TECH_CATEGORY = {name: category for category, names in TECHNOLOGIES.items() for name in names}
+
+SOFT_SKILLS = {
+    # English name -> (Polish name, description)
+    "Teamwork": ("Praca zespołowa", "Cooperating with other members of a project team"),
+    "Communication": ("Komunikacja", "Presenting results to technical and business audiences"),
+    "Problem solving": ("Rozwiązywanie problemów", "Identifying and solving complex, non-standard problems"),
+    "Analytical thinking": ("Myślenie analityczne", "Analysing data and processes to draw conclusions"),
+    "Critical thinking": ("Myślenie krytyczne", "Critically assessing knowledge and its sources"),
+    "Leadership": ("Przywództwo", "Leading a team and delegating tasks"),
+    "Time management": ("Zarządzanie czasem", "Planning one's own work against deadlines"),
+    "Decision making": ("Podejmowanie decyzji", "Making decisions under uncertainty"),
+    "Self-learning": ("Samokształcenie", "Planning and carrying out lifelong learning"),
+    "Creativity": ("Kreatywność", "Generating innovative ideas and solutions"),
+    "Ethics": ("Etyka zawodowa", "Following professional and ethical principles"),
+    "Negotiation": ("Negocjacje", "Negotiating with stakeholders"),
+    "Project management": ("Zarządzanie projektami", "Planning, executing and monitoring projects"),
+    "Attention to detail": ("Dokładność", "Working precisely and thoroughly"),
+    "Adaptability": ("Elastyczność", "Adapting to changing requirements"),
+    "Mentoring": ("Mentoring", "Supporting the development of other team members"),
+}
+
+REQUIREMENT_TEMPLATES = [
+    "{tech}", "{tech}", "{tech}", "Experience with {tech}", "{years}+ years of experience with {tech}",
+    "Commercial experience in {tech}", "Good knowledge of {tech}", "Knowledge of {tech} and {other}",
+    "Familiarity with {tech} or {other}", "Hands-on experience with {tech} in production",
+    "Znajomość {tech}", "Doświadczenie w pracy z {tech}", "Minimum {years} lata doświadczenia z {tech}",
+    "{soft}", "Very good command of English", "Bardzo dobra znajomość języka angielskiego",
+    "Strong {soft_lower} skills", "Higher education in Computer Science or a related field",
+]
+LEVELS = ["Junior", "Mid", "Senior", "Lead", "Principal", "Staff", "Trainee"]
+ROLES = ["Developer", "Engineer", "Software Engineer", "Data Engineer", "Data Analyst", "Architect", "Consultant",
+         "Tester", "DevOps Engineer", "Team Leader"]
+SPECIALIZATIONS = ["Backend", "Frontend", "Fullstack", "Data", "DevOps", "Mobile", "Embedded", "Security", "QA",
+                   "AI/ML", "Business Analytics", "No specialization listed"]
+
+# Outcome rows of a syllabus; the W/U/K prefix is the outcome code group (knowledge, skills, social competences)
+OUTCOME_TEMPLATES = {
+    "pl": {
+        "W": ["Zna {tech} oraz {other} w zakresie {topic}.", "Charakteryzuje zasady {topic} i rolę {tech}.",
+              "Identyfikuje i dobiera odpowiednie elementy {tech} do {topic}."],
+        "U": ["Posługuje się {tech} do realizacji projektów z obszaru {topic}.",
+              "Projektuje i implementuje rozwiązania z użyciem {tech} i {other}.",
+              "Buduje modele {topic} w {tech}; przeprowadza eksperymenty i wyciąga wnioski."],
+        "K": ["Jest gotów do pracy w zespole; {soft}.", "Rozumie znaczenie kompetencji: {soft}."],
+    },
+    "en": {
+        "W": ["Knows {tech} and {other} in the field of {topic}.", "Describes the principles of {topic} and the role of {tech}.",
+              "Identifies the elements of {tech} suitable for {topic}."],
+        "U": ["Uses {tech} to implement projects in the area of {topic}.",
+              "Designs and implements solutions using {tech} and {other}.",
+              "Builds {topic} models in {tech}; runs experiments and draws conclusions."],
+        "K": ["Is ready to work in a team; {soft}.", "Understands the importance of {soft}."],
+    },
+}
+TOPICS = {
+    "pl": ["analizy danych", "uczenia maszynowego", "inżynierii oprogramowania", "baz danych", "systemów rozproszonych",
+           "zarządzania projektami", "symulacji", "bezpieczeństwa systemów", "wizualizacji danych", "optymalizacji"],
+    "en": ["data analysis", "machine learning", "software engineering", "databases", "distributed systems",
+           "project management", "simulation", "system security", "data visualization", "optimization"],
+}
+HEADINGS = {
+    "pl": ("Przedmiotowe efekty uczenia się", "Efekt przedmiotowy Treść Efekt kierunkowy",
+           "Treści programowe zapewniające uzyskanie efektów uczenia się",
+           {"W": "Z zakresu wiedzy", "U": "Z zakresu umiejętności", "K": "Z zakresu kompetencji społecznych"},
+           "Sylabusy"),
+    "en": ("Subject's learning outcomes", "Subject's outcome Content Learning outcome",
+           "Program content ensuring learning outcomes",
+           {"W": "In terms of knowledge", "U": "In terms of skills", "K": "In terms of social competences"},
+           "Syllabuses"),
+}
+
+
+def zipf_weights(n):
+    """Cumulative Zipf weights for random.choices over n items, most popular first."""
+    return list(accumulate(1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(n)))
+
+
+TECH_WEIGHTS = zipf_weights(len(TECH_NAMES))
+COMPANY_WEIGHTS = zipf_weights(COMPANIES)
+
+
+# === JOB POSTINGS ===
+def requirement(rng, techs):
+    """One free-text requirement line, usually naming one of the posting's technologies."""
+    soft = rng.choice(list(SOFT_SKILLS))
+    return rng.choice(REQUIREMENT_TEMPLATES).format(
+        tech=rng.choice(techs),
+        other=rng.choices(TECH_NAMES, cum_weights=TECH_WEIGHTS)[0],
+        years=rng.randint(1, 8),
+        soft=soft,
+        soft_lower=soft.lower(),
+    )
+
+
+def iter_jobs(n, seed=0):
+    """
+    Yield n job postings with the scraper's fields.
+
+    Technologies and companies follow a Zipf distribution, and the free-text
+    requirements combine them with years and phrasing, so, like the real data,
+    the number of distinct job-skill strings keeps growing with the corpus.
+    """
+    rng = random.Random(seed)
+    for i in range(n):
+        techs = list(dict.fromkeys(rng.choices(TECH_NAMES, cum_weights=TECH_WEIGHTS, k=rng.randint(3, 12))))
+        n_expected = rng.randint(0, len(techs))
+        expected, optional = techs[:n_expected], techs[n_expected:]
+        yield {
+            "title": f"{rng.choice(LEVELS)} {techs[0]} {rng.choice(ROLES)}",
+            "company": f"Company {rng.choices(range(COMPANIES), cum_weights=COMPANY_WEIGHTS)[0]}",
+            "requirements": [requirement(rng, techs) for _ in range(rng.randint(1, 8))],
+            "technologies_expected": ", ".join(expected) or "No expected technologies",
+            "technologies_optional": ", ".join(optional) or "No optional technologies",
+            "specializations": rng.choice(SPECIALIZATIONS),
+            "url": f"https://it.example.com/offers/{seed}/{i}",
+        }
+
+
+def write_jobs(path, n, seed=0):
+    """Write n postings as JSON Lines (compare.py streams either format)."""
+    with open(path, "w", encoding="utf-8") as f:
+        for job in iter_jobs(n, seed):
+            f.write(json.dumps(job, ensure_ascii=False))
+            f.write("\n")
+
+
+# === SYLLABI ===
+def outcome(rng, language, group):
+    soft_name = rng.choice(list(SOFT_SKILLS))
+    soft = soft_name if language == "en" else SOFT_SKILLS[soft_name][0]
+    return rng.choice(OUTCOME_TEMPLATES[language][group]).format(
+        tech=rng.choices(TECH_NAMES, cum_weights=TECH_WEIGHTS)[0],
+        other=rng.choices(TECH_NAMES, cum_weights=TECH_WEIGHTS)[0],
+        topic=rng.choice(TOPICS[language]),
+        soft=soft.lower(),
+    )
+
+
+def syllabus_document(index, language, subjects=SUBJECTS_PER_DOCUMENT, seed=0):
+    """
+    Raw text of one converted syllabus PDF in 'pl' or 'en'.
+
+    Mirrors the layout of the sample PDFs: per subject, a header, the
+    learning-outcomes table (outcome code, content, K2_IZ programme-outcome
+    codes; long contents wrap onto the next lines), page footers, and the
+    programme-content section that ends the table.
+    """
+    rng = random.Random(f"{seed}-{language}-{index}")
+    start, columns, end, groups, footer = HEADINGS[language]
+    lines = []
+    for subject in range(subjects):
+        topic = rng.choice(TOPICS[language])
+        lines += [f"Subject {index}.{subject}: {topic}", f"Code: W8N-{index:03d}-{subject:03d}",
+                  "ECTS: 5 Hours: 30 / 30 / 15", "", start, columns]
+        for group, heading in groups.items():
+            lines.append(heading)
+            for number in range(1, rng.randint(2, 4)):
+                code = f"PEU_{group}{number:02d}"
+                targets = ", ".join(f"K2_IZ_{group}{rng.randint(1, 20):02d}" for _ in range(rng.randint(1, 3)))
+                text = outcome(rng, language, group)
+                if len(text) > 60 and rng.random() < 0.5:
+                    split = text.index(" ", 40)
+                    lines += [f"{code} {text[:split]}", f"{text[split + 1:]} {targets}"]
+                else:
+                    lines.append(f"{code} {text} {targets}")
+            if rng.random() < 0.2:
+                lines += [f"{footer} {rng.randint(1, 90)} / 91", ""]
+        lines += [end, " ".join(outcome(rng, language, "U") for _ in range(4)), ""]
+    return "\n".join(lines)
+
+
+# === EXTRACTED SKILLS ===
+def name_variant(rng, name):
+    """How the LLM might spell a skill in one document ('Python', 'python', 'Python programming', ...)."""
+    choice = rng.random()
+    if choice < 0.6:
+        return name
+    if choice < 0.75:
+        return name.lower()
+    if choice < 0.85:
+        return f" {name} "
+    if choice < 0.95:
+        return f"{name} programming" if TECH_CATEGORY.get(name) == "Programming Language" else f"{name} tools"
+    return name.upper()
+
+
+def skills_for(rng, techs, soft_skills, title):
+    return ExtractedSkills(
+        technologies=[TechnologySkill(name=name_variant(rng, tech), category=TECH_CATEGORY[tech]) for tech in techs],
+        soft_skills=[SoftSkill(name=name_variant(rng, name), description=SOFT_SKILLS[name][1]) for name in soft_skills],
+        document_title=title,
+    )
+
+
+def skills_in_text(text, seed=0):
+    """The technologies and soft skills a syllabus mentions, spelled as the LLM might."""
+    rng = random.Random(f"{seed}-{len(text)}-{text[:200]}")
+    lowered = text.lower()
+    techs = [tech for tech in TECH_NAMES if f" {tech.lower()} " in lowered or f" {tech.lower()}." in lowered]
+    soft_skills = [name for name, (polish, _) in SOFT_SKILLS.items() if name.lower() in lowered or polish.lower() in lowered]
+    return skills_for(rng, techs, soft_skills, "Synthetic syllabus")
+
+
+def iter_extracted_skills(n_documents, seed=0):
+    """Yield n_documents ExtractedSkills with 5-40 technologies and 2-10 soft skills each."""
+    rng = random.Random(seed)
+    for i in range(n_documents):
+        techs = list(dict.fromkeys(rng.choices(TECH_NAMES, cum_weights=TECH_WEIGHTS, k=rng.randint(5, 40))))
+        soft_skills = rng.sample(list(SOFT_SKILLS), rng.randint(2, 10))
+        yield skills_for(rng, techs, soft_skills, f"Document {i}")
+
+
+# === STAND-IN ENCODER ===
+def standin_vocabulary():
+    """Every lower-cased word the generators can emit."""
+    texts = TECH_NAMES + REQUIREMENT_TEMPLATES + LEVELS + ROLES + SPECIALIZATIONS + [
+        "programming tools No expected optional technologies"]
+    for name, (polish, description) in SOFT_SKILLS.items():
+        texts += [name, polish, description]
+    for language in ("pl", "en"):
+        texts += TOPICS[language]
+        for templates in OUTCOME_TEMPLATES[language].values():
+            texts += templates
+    words = set()
+    for text in texts:
+        for word in text.lower().split():
+            words.add(word)
+            words.add(word.strip(string.punctuation))
+    words.discard("")
+    return sorted(words)
+
+
+def build_standin_model(path, dim=STANDIN_DIM, seed=0):
+    """
+    Save a tiny sentence-transformers model to path (unless it is already there) and return path.
+
+    It averages fixed random word vectors over a whitespace tokenizer, so it
+    loads in milliseconds and needs no download, but goes through the same
+    SentenceTransformer.encode() batching and pooling as the real model.
+    Strings that share words get similar embeddings.
+    """
+    path = Path(path)
+    if (path / "modules.json").exists():
+        return path
+
+    # Imported only to build the model: the runner's memory is not the benchmarked scripts'
+    import numpy as np
+    from sentence_transformers import SentenceTransformer, models
+    from sentence_transformers.models.tokenizer import WhitespaceTokenizer
+
+    vocabulary = standin_vocabulary()
+    weights = np.random.default_rng(seed).standard_normal((len(vocabulary), dim)).astype(np.float32)
+    tokenizer = WhitespaceTokenizer(vocab=vocabulary, stop_words=[], do_lower_case=True)
+    model = SentenceTransformer(modules=[models.WordEmbeddings(tokenizer, weights), models.Pooling(dim)], device="cpu")
+    model.save(str(path))
+    return path
@@ -0,0 +1,35 @@
+import argparse
+import importlib
+import sys
+
+# Subcommand -> (module whose main(argv) runs it, help). Modules are imported only when their subcommand runs,
+# so `ala --help` and `ala convert` never load openai, torch, sentence-transformers or pandas.
+COMMANDS = {
+    "convert": ("main", "Convert the syllabus PDFs in input/ to markdown with their learning outcomes (main.py)"),
+    "extract": ("parse_to_json", "Extract skills from the markdown in output/ into extracted_skills.json (parse_to_json.py)"),
+    "compare": ("compare", "Match job postings against the extracted study skills (compare.py)"),
+    "serve": ("service", "Serve matching of single postings or batches over HTTP with a warm model (service.py)"),
+}
+
+
+def main(argv=None):
+    """
+    Entry point of the `ala` command: `ala <convert|extract|compare|serve> [options]`.
+
+    Everything after the subcommand is passed to that step's own argument
+    parser, so `ala compare --help` lists compare.py's options.
+    """
+    parser = argparse.ArgumentParser(prog="ala", description="Syllabus skill extraction and job-market comparison pipeline.")
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=True)
+    for name, (_, help) in COMMANDS.items():
+        subparsers.add_parser(name, help=help, add_help=False)
+    args, rest = parser.parse_known_args(argv)
+
+    module = importlib.import_module(COMMANDS[args.command][0])
+    # Usage messages and --profile reports then show the subcommand rather than the script name
+    sys.argv = [f"{parser.prog} {args.command}", *rest]
+    return module.main(rest)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+from pathlib import Path
+
+import numpy as np
+
+ROW_GROUP_SIZE = 1 << 20  # Maximum rows per Parquet row group
+
+
+def import_pyarrow():
+    """Import pyarrow, which is only needed for Parquet output."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet output requires pyarrow, from the parquet extra: uv sync --extra parquet "
+                          "(or pip install 'ala[parquet]')") from e
+    return pyarrow, pyarrow.parquet
+
+
+class ParquetResults:
+    """
+    Columnar counterpart of compare.py's CSV outputs, written to one directory.
+
+    - job_skill_matches[_t<threshold>].parquet: per-job results, with a job_id column
+    - match_edges.parquet: one row per (job_id, job_skill_id, study_skill_id, score) pair
+      at or above the threshold (the lowest one when sweeping)
+    - job_skills.parquet / study_skills.parquet: the skill behind each id
+    - study_skill_match_counts[_t<threshold>].parquet and job_skill_frequencies.parquet
+
+    Per-job results and edges are appended chunk by chunk; each chunk becomes
+    one or more row groups, so the files never have to be held in memory.
+    String columns are dictionary-encoded. Read back only the columns needed,
+    memory-mapped:
+
+        pq.read_table("parquet/match_edges.parquet", columns=["job_id", "score"], memory_map=True)
+    """
+
+    def __init__(self, directory, match_names, row_group_size: int = ROW_GROUP_SIZE):
+        """
+        Args:
+            directory: Output directory (created if missing)
+            match_names: File name of the per-job results of each threshold, e.g. job_skill_matches.parquet
+            row_group_size: Maximum rows per row group
+        """
+        self.pa, self.pq = import_pyarrow()
+        pa = self.pa
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.row_group_size = row_group_size
+        self.job_skill_ids = {}  # Normalized job skill -> job_skill_id, in order of first appearance
+        self.total_jobs = 0
+
+        strings = pa.dictionary(pa.int32(), pa.string())
+        self.match_schema = pa.schema([
+            ("job_id", pa.int64()), ("job_title", strings), ("company", strings),
+            ("matched_job_skills", pa.int64()), ("total_job_skills", pa.int64()), ("match_ratio", pa.float64()),
+        ])
+        self.edge_schema = pa.schema([
+            ("job_id", pa.int64()), ("job_skill_id", pa.int32()), ("study_skill_id", pa.int32()), ("score", pa.float32()),
+        ])
+        self.match_writers = [self.pq.ParquetWriter(self.directory / name, self.match_schema) for name in match_names]
+        self.edge_writer = self.pq.ParquetWriter(self.directory / "match_edges.parquet", self.edge_schema)
+
+    def _strings(self, values):
+        return self.pa.array(values, type=self.pa.string()).dictionary_encode()
+
+    def write_chunk(self, results_per_threshold, vocabulary, edges) -> None:
+        """
+        Append one chunk of jobs.
+
+        Args:
+            results_per_threshold: Result rows of the chunk (see compare.RESULT_COLUMNS), per threshold
+            vocabulary: The chunk's distinct normalized job skills, which edge rows index into
+            edges: (job_ids, rows, study_ids, scores) with chunk-local job ids and vocabulary rows
+        """
+        pa = self.pa
+        n_jobs = len(results_per_threshold[0])
+        job_ids = pa.array(range(self.total_jobs, self.total_jobs + n_jobs), type=pa.int64())
+        for writer, results in zip(self.match_writers, results_per_threshold):
+            table = pa.Table.from_arrays([
+                job_ids,
+                self._strings([r["job_title"] for r in results]),
+                self._strings([r["company"] for r in results]),
+                pa.array([r["matched_job_skills"] for r in results], type=pa.int64()),
+                pa.array([r["total_job_skills"] for r in results], type=pa.int64()),
+                pa.array([float(r["match_ratio"]) for r in results], type=pa.float64()),
+            ], schema=self.match_schema)
+            writer.write_table(table, row_group_size=self.row_group_size)
+
+        # Chunk vocabulary rows -> global job skill ids
+        global_ids = np.array([self.job_skill_ids.setdefault(skill, len(self.job_skill_ids)) for skill in vocabulary],
+                              dtype=np.int64)
+        edge_jobs, edge_rows, edge_study, edge_scores = edges
+        if len(edge_jobs):
+            table = pa.Table.from_arrays([
+                pa.array(edge_jobs + self.total_jobs, type=pa.int64()),
+                pa.array(global_ids[edge_rows], type=pa.int32()),
+                pa.array(edge_study, type=pa.int32()),
+                pa.array(edge_scores, type=pa.float32()),
+            ], schema=self.edge_schema)
+            self.edge_writer.write_table(table, row_group_size=self.row_group_size)
+        self.total_jobs += n_jobs
+
+    def write_summaries(self, study_skills, study_skill_match_counts, count_names, job_skill_counter) -> None:
+        """
+        Write the id tables, the study-skill match counts of each threshold and the job-skill frequencies.
+
+        Args:
+            study_skills: Study skill of each study_skill_id
+            study_skill_match_counts: Per threshold, the number of jobs each study skill matched
+            count_names: File name of the match counts of each threshold
+            job_skill_counter: Occurrences of each raw job skill
+        """
+        pa, pq = self.pa, self.pq
+        pq.write_table(pa.table({
+            "job_skill_id": pa.array(range(len(self.job_skill_ids)), type=pa.int32()),
+            "job_skill": self._strings(list(self.job_skill_ids)),
+        }), self.directory / "job_skills.parquet")
+        pq.write_table(pa.table({
+            "study_skill_id": pa.array(range(len(study_skills)), type=pa.int32()),
+            "study_skill": self._strings(study_skills),
+        }), self.directory / "study_skills.parquet")
+        for counts, name in zip(study_skill_match_counts, count_names):
+            pq.write_table(pa.table({
+                "study_skill_id": pa.array(range(len(study_skills)), type=pa.int32()),
+                "study_skill": self._strings(study_skills),
+                "match_count": pa.array(counts, type=pa.int64()),
+            }), self.directory / name)
+        pq.write_table(pa.table({
+            "job_skill": self._strings(list(job_skill_counter)),
+            "frequency": pa.array(list(job_skill_counter.values()), type=pa.int64()),
+        }), self.directory / "job_skill_frequencies.parquet")
+
+    def close(self) -> None:
+        for writer in self.match_writers:
+            writer.close()
+        self.edge_writer.close()
@@ -1,106 +1,256 @@
+import argparse
 import json
-import pandas as pd
-from sentence_transformers import SentenceTransformer, util
-import torch
-from tqdm import tqdm
+import multiprocessing
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+import profiling
+from columnar import ParquetResults
+from embedding_cache import EmbeddingCache
+from job_stream import iter_chunks, iter_jobs
+from matching import TILE_ROWS, DenseMatcher, IndexMatcher, build_offsets, normalize_rows
+from quantize import PRECISIONS, count_flips
+from result_store import ResultStore
+from skill_index import ExactIndex, build_index, recall
 
 # === CONFIGURATION ===
-JOBS_PATH = "job_descriptions.json"
+JOBS_PATH = "job_descriptions.json"  # JSON array or JSON Lines (.jsonl)
 SKILLS_PATH = "extracted_skills.json"
 OUTPUT_CSV = "job_skill_matches.csv"
 SIMILARITY_THRESHOLD = 0.50
 MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"  # Multilingual
 BATCH_SIZE = 64
+VOCAB_BATCH_SIZE = 512  # Larger batches for the deduplicated job-skill vocabulary
+JOB_CHUNK_SIZE = 10000  # Postings read, encoded and matched at a time; bounds memory use
+SHARD_SIZE = 1000  # Postings per work item with --workers > 1
+CACHE_DIR = ".embedding_cache"  # Set to None to disable the persistent embedding cache
+CACHE_DTYPE = "float32"  # "float16" halves the cache size on disk
+TOP_K = 10  # Nearest study skills considered per job skill with --index
+RECALL_SAMPLE = 5000  # Job skills used to measure an approximate index's recall
+RESULT_STORE = ".compare_store.sqlite"  # Per-job results kept between runs with --incremental
+JOB_SKILL_FIELDS = ["requirements", "technologies_expected", "technologies_optional", "specializations"]
+RESULT_COLUMNS = ["job_title", "company", "matched_job_skills", "total_job_skills", "match_ratio"]
 
 # === LOAD JSON ===
 def load_json(path):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-# === MAIN SCRIPT ===
-def main():
-    # Load files
-    jobs_data = load_json(JOBS_PATH)
-    skills_data = load_json(SKILLS_PATH)
+def load_study_skills(paths):
+    """Study-acquired skills (technology names, then soft-skill descriptions) of every extracted skills file."""
+    study_skills = []
+    for skills_path in paths:
+        skills_data = load_json(skills_path)
+        tech_skills = [s["name"] for s in skills_data["technologies"]]
+        soft_skills = [s.get("description", s["name"]) for s in skills_data["soft_skills"]]
+        study_skills += tech_skills + soft_skills
+    return study_skills
 
-    # Prepare study-acquired skills (tech + soft)
-    tech_skills = [s["name"] for s in skills_data["technologies"]]
-    soft_skills = [s.get("description", s["name"]) for s in skills_data["soft_skills"]]
-    study_skills = tech_skills + soft_skills
+# === JOB SKILLS ===
+def get_job_skill_texts(job):
+    """Return the individual skill entries listed in a job posting."""
+    job_skill_texts = []
+    for field in JOB_SKILL_FIELDS:
+        val = job.get(field)
+        if val:
+            if isinstance(val, list):
+                items = val
+            else:
+                # Split by both ',' and ';'
+                items = []
+                for part in str(val).split(';'):
+                    items.extend([x.strip() for x in part.split(',') if x.strip()])
+            job_skill_texts.extend([str(x).strip() for x in items if x and str(x).strip()])
+    return job_skill_texts
 
-    total_study_skills = len(study_skills)
+def normalize_skill(text):
+    """Normalize a skill string before encoding (collapse internal whitespace)."""
+    return " ".join(text.split())
 
-    # Load model
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = SentenceTransformer(MODEL_NAME, device=device)
+def build_vocabulary(job_skill_lists):
+    """
+    Map every job skill onto a vocabulary of distinct normalized strings.
 
-    # Encode study skills
-    print(f"Encoding {total_study_skills} study-acquired skills...")
-    study_embeddings = model.encode(study_skills, convert_to_tensor=True, batch_size=BATCH_SIZE, show_progress_bar=True)
+    Returns the vocabulary and, for each job, the vocabulary indices of its skills,
+    so each distinct string only has to be encoded once for the whole corpus.
+    """
+    vocabulary = []
+    vocab_index = {}
+    job_skill_indices = []
+    for job_skill_texts in job_skill_lists:
+        indices = []
+        for skill in job_skill_texts:
+            key = normalize_skill(skill)
+            idx = vocab_index.get(key)
+            if idx is None:
+                idx = vocab_index[key] = len(vocabulary)
+                vocabulary.append(key)
+            indices.append(idx)
+        job_skill_indices.append(indices)
+    return vocabulary, job_skill_indices
 
-    # Prepare results and statistics
-    results = []
-    study_skill_match_counts = [0] * total_study_skills  # For each study skill, how many job skills it matched
-    job_skill_counter = {}  # For each job skill, how many times it appears (across all jobs)
-    print(f"Processing {len(jobs_data)} job descriptions...")
-    for job in tqdm(jobs_data, desc="Jobs"):
-        job_title = job.get("title", "")
-        company = job.get("company", "")
-
-        # Extract individual job skill entries
-        job_skill_texts = []
-        for field in ["requirements", "technologies_expected", "technologies_optional", "specializations"]:
-            val = job.get(field)
-            if val:
-                if isinstance(val, list):
-                    items = val
-                else:
-                    # Split by both ',' and ';'
-                    items = []
-                    for part in str(val).split(';'):
-                        items.extend([x.strip() for x in part.split(',') if x.strip()])
-                job_skill_texts.extend([str(x).strip() for x in items if x and str(x).strip()])
-
-        # Count job skill occurrences
+# === ENCODING ===
+def time_forward_passes(model):
+    """
+    Record each forward pass of a loaded model as an 'encode.forward' span.
+
+    model.encode() tokenizes and runs the model batch by batch; the difference
+    between 'encode.model' and 'encode.forward' is tokenization and batching.
+    """
+    starts = []
+
+    def before(module, args):
+        starts.append((time.time(), time.perf_counter()))
+
+    def after(module, args, output):
+        wall, start = starts.pop()
+        profiling.profiler.record("encode.forward", time.perf_counter() - start, wall)
+
+    model.register_forward_pre_hook(before)
+    model.register_forward_hook(after)
+
+class SkillEncoder:
+    """Encodes skill strings, loading the model only when something is missing from the cache."""
+
+    def __init__(self, model_name=MODEL_NAME, cache_dir=CACHE_DIR, read_only=False, show_progress=True, max_pending=None):
+        self.model_name = model_name
+        self.cache = EmbeddingCache(cache_dir, model_name, dtype=CACHE_DTYPE, read_only=read_only,
+                                    max_pending=max_pending) if cache_dir else None
+        self.show_progress = show_progress
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            with profiling.span("model.load"):
+                # Imported here: runs answered from the embedding cache never load torch
+                import torch
+                from sentence_transformers import SentenceTransformer
+
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                self._model = SentenceTransformer(self.model_name, device=device)
+            if profiling.profiler.enabled:
+                time_forward_passes(self._model)
+        return self._model
+
+    def _encode_with_model(self, texts, batch_size):
+        profiling.count("encode.model_texts", len(texts))
+        with profiling.span("encode.model", texts=len(texts)):
+            return self.model.encode(texts, convert_to_numpy=True, batch_size=batch_size, show_progress_bar=self.show_progress and len(texts) > batch_size)
+
+    def encode(self, texts, batch_size=BATCH_SIZE):
+        """Return float32 embeddings for normalized texts as a numpy array."""
+        profiling.count("encode.texts", len(texts))
+        with profiling.span("encode", texts=len(texts)):
+            if self.cache is None:
+                if not texts:
+                    # model.encode([]) returns a 1-D array; the dimension method was renamed in sentence-transformers 5
+                    dimension = getattr(self.model, "get_embedding_dimension", None) or self.model.get_sentence_embedding_dimension
+                    return np.empty((0, dimension()), dtype=np.float32)
+                return self._encode_with_model(texts, batch_size)
+            return self.cache.encode(texts, lambda missing: self._encode_with_model(missing, batch_size))
+
+    def take_unsaved(self):
+        """Embeddings computed by a read-only encoder that the main process should persist."""
+        if self.cache is None:
+            return [], None
+        return self.cache.take_unsaved()
+
+    def save(self, texts, embeddings):
+        """Persist embeddings computed elsewhere (e.g. by a worker process)."""
+        if self.cache is not None and texts:
+            self.cache.add(texts, embeddings)
+
+# === CHUNK PROCESSING ===
+class ChunkResult(NamedTuple):
+    """Outcome of matching one chunk of job postings."""
+
+    results_per_threshold: list  # Result rows (RESULT_COLUMNS) per threshold
+    job_skill_counts: dict  # Occurrences of each raw job skill
+    study_skill_match_counts: list  # Per threshold, the number of jobs each study skill matched
+    job_study_ids: Optional[list] = None  # Per threshold, matched study-skill indices of each job (matcher.with_pairs)
+    vocabulary: Optional[list] = None  # Distinct normalized job skills, which edge rows index into (matcher.with_edges)
+    edges: Optional[tuple] = None  # (job_ids, rows, study_ids, scores) with chunk-local job ids (matcher.with_edges)
+
+def process_job_chunk(jobs, encoder, matcher):
+    """
+    Encode and match one chunk of job postings against the study skills.
+
+    Each distinct job-skill string in the chunk is encoded once (through the
+    embedding cache, so strings seen in earlier chunks are not re-encoded).
+
+    Returns:
+        ChunkResult: Per-job results and counts, plus matched pairs and edges if the matcher collects them
+    """
+    with profiling.span("chunk.vocabulary", jobs=len(jobs)):
+        job_skill_lists = [get_job_skill_texts(job) for job in jobs]
+        vocabulary, job_skill_indices = build_vocabulary(job_skill_lists)
+    profiling.count("jobs", len(jobs))
+    profiling.count("job_skills.distinct_per_chunk", len(vocabulary))
+    vocab_embeddings = normalize_rows(encoder.encode(vocabulary, batch_size=VOCAB_BATCH_SIZE))
+
+    # Job skills are rows of one CSR matrix, compared tile by tile
+    rows, offsets = build_offsets(job_skill_indices)
+    with profiling.span("match", jobs=len(jobs), rows=len(rows)):
+        matches = matcher.match(vocab_embeddings, rows, offsets)  # One MatchResult per threshold
+
+    # Count job skill occurrences
+    job_skill_counts = {}
+    for job_skill_texts in job_skill_lists:
         for skill in job_skill_texts:
-            job_skill_counter[skill] = job_skill_counter.get(skill, 0) + 1
+            job_skill_counts[skill] = job_skill_counts.get(skill, 0) + 1
+
+    results_per_threshold = []
+    for match in matches:
+        results = []
+        for job, job_skill_texts, match_counts in zip(jobs, job_skill_lists, match.matched_job_skills.tolist()):
+            total_job_skills = len(job_skill_texts)
+            match_ratio = match_counts / total_job_skills if total_job_skills > 0 else 0
 
-        if not job_skill_texts:
             results.append({
-                "job_title": job_title,
-                "company": company,
-                "matched_job_skills": 0,
-                "total_job_skills": 0,
-                "match_ratio": 0
+                "job_title": job.get("title", ""),
+                "company": job.get("company", ""),
+                "matched_job_skills": match_counts,
+                "total_job_skills": total_job_skills,
+                "match_ratio": match_ratio
             })
-            continue
+        results_per_threshold.append(results)
 
-        # Encode each job skill individually
-        job_embeddings = model.encode(job_skill_texts, convert_to_tensor=True, batch_size=BATCH_SIZE, show_progress_bar=False)
+    job_study_ids = None
+    if matches and matches[0].job_study_pairs is not None:
+        job_study_ids = []
+        for match in matches:
+            job_ids, study_ids = match.job_study_pairs
+            bounds = np.searchsorted(job_ids, np.arange(1, len(jobs)))
+            job_study_ids.append([ids.tolist() for ids in np.split(study_ids, bounds)])
 
-        # Compute pairwise similarity
-        similarity_matrix = util.cos_sim(job_embeddings, study_embeddings)  # shape: (job_skills, study_skills)
-        match_counts = (similarity_matrix >= SIMILARITY_THRESHOLD).any(dim=1).sum().item()
+    return ChunkResult(results_per_threshold, job_skill_counts, [match.study_skill_match_counts for match in matches],
+                       job_study_ids, vocabulary if matcher.with_edges else None, matches[0].edges if matches else None)
 
-        # For each study skill, count if it matched any job skill in this job
-        study_skill_matches = (similarity_matrix >= SIMILARITY_THRESHOLD).any(dim=0).cpu().numpy()
-        study_skill_match_counts = [a + int(b) for a, b in zip(study_skill_match_counts, study_skill_matches)]
+def write_results(results, path, header):
+    """Write (header=True) or append a chunk of per-job results to the output CSV."""
+    import pandas as pd
 
-        total_job_skills = len(job_skill_texts)
-        match_ratio = match_counts / total_job_skills if total_job_skills > 0 else 0
+    with profiling.span("write.csv", rows=len(results)):
+        df = pd.DataFrame(results, columns=RESULT_COLUMNS)
+        df["match_ratio"] = df["match_ratio"].astype(float)
+        df.to_csv(path, mode="w" if header else "a", header=header, index=False)
 
-        results.append({
-            "job_title": job_title,
-            "company": company,
-            "matched_job_skills": match_counts,
-            "total_job_skills": total_job_skills,
-            "match_ratio": match_ratio
-        })
+def threshold_path(path, threshold, sweep):
+    """Suffix an output path with its threshold when sweeping (job_skill_matches_t0.45.csv)."""
+    if not sweep:
+        return path
+    stem, dot, suffix = path.rpartition(".")
+    return f"{stem}_t{threshold:g}{dot}{suffix}"
 
-    # Export CSV
-    df = pd.DataFrame(results)
-    df.to_csv(OUTPUT_CSV, index=False)
-    print(f"Done. Results saved to: {OUTPUT_CSV}")
+def write_summary(study_skills, study_skill_match_counts, job_skill_counter, summary_path, counts_path):
+    """Print and save the summary statistics and the full study-skill match counts."""
+    import pandas as pd
 
     # === SUMMARY STATISTICS ===
     # 1. Study skill with most matches
@@ -118,7 +268,7 @@ def main():
         print("No job skills found in the dataset.")
 
     # Optionally, save summary to a file
-    with open("job_skill_summary.txt", "w", encoding="utf-8") as f:
+    with open(summary_path, "w", encoding="utf-8") as f:
         f.write(f"Study-acquired skill with most matches: '{max_study_skill}' (matched in {max_study_count} job descriptions)\n")
         if job_skill_counter:
             f.write(f"Job skill needed the most: '{most_needed_job_skill}' (appeared {most_needed_job_skill_count} times across all jobs)\n")
@@ -126,19 +276,359 @@ def main():
             f.write("No job skills found in the dataset.\n")
 
     # === FULL LISTS ===
-    # 1. Study-acquired skills with match counts
+    # Study-acquired skills with match counts
     study_skill_df = pd.DataFrame({
         'study_skill': study_skills,
         'match_count': study_skill_match_counts
     })
     study_skill_df = study_skill_df.sort_values(by='match_count', ascending=False)
-    study_skill_df.to_csv('study_skill_match_counts.csv', index=False)
-    print("Full study skill match counts saved to: study_skill_match_counts.csv")
+    with profiling.span("write.csv", rows=len(study_skill_df)):
+        study_skill_df.to_csv(counts_path, index=False)
+    print(f"Full study skill match counts saved to: {counts_path}")
+
+# === PARALLEL WORKERS ===
+_worker = {}
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+class _WorkerProcess(multiprocessing.context.SpawnProcess):
+    """
+    Spawned worker started with capped BLAS/OpenMP thread pools.
+
+    The variables must be in the child's environment before it imports numpy
+    or torch, so they are set only while the child is started and the parent's
+    environment is restored straight after. Variables the user has set are
+    left as they are.
+    """
+
+    threads = None
+
+    def start(self):
+        saved = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+        for var, value in saved.items():
+            if value is None and self.threads is not None:
+                os.environ[var] = str(self.threads)
+        try:
+            super().start()
+        finally:
+            for var, value in saved.items():
+                if value is None:
+                    os.environ.pop(var, None)
+
+class _WorkerContext(multiprocessing.context.SpawnContext):
+    """Spawn context whose processes are _WorkerProcess with the given thread cap."""
+
+    def __init__(self, threads):
+        super().__init__()
+        self.threads = threads
+
+    def Process(self, *args, **kwargs):
+        process = _WorkerProcess(*args, **kwargs)
+        process.threads = self.threads
+        return process
+
+def _init_worker(model_name, matcher, torch_threads, profile_config):
+    """Load the encoder once per worker process and cap its thread pool."""
+    import torch
+
+    profiling.init_worker(*profile_config)
+    torch.set_num_threads(torch_threads)
+    _worker["encoder"] = SkillEncoder(model_name, read_only=True, show_progress=False)
+    _worker["matcher"] = matcher
+
+def _process_shard(jobs):
+    """Worker entry point: match one shard and hand back newly computed embeddings and profiling data."""
+    encoder = _worker["encoder"]
+    chunk_result = process_job_chunk(jobs, encoder, _worker["matcher"])
+    return chunk_result, encoder.take_unsaved(), profiling.snapshot()
+
+def iter_chunk_results(chunks, encoder, matcher, workers=1):
+    """
+    Yield process_job_chunk results for each chunk, in input order.
+
+    With workers > 1 the chunks are matched in a process pool. Results are
+    consumed strictly in submission order, so the merged outputs are identical
+    to a single-process run; at most 2 * workers chunks are in flight at once.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield process_job_chunk(chunk, encoder, matcher)
+        return
+
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+    # Workers get capped BLAS thread pools, avoiding oversubscription, without changing this process's environment
+    context = _WorkerContext(torch_threads)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(encoder.model_name, matcher, torch_threads, profiling.worker_config())) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_process_shard, chunk))
+            if len(pending) >= 2 * workers:
+                chunk_result, unsaved, profile = pending.popleft().result()
+                encoder.save(*unsaved)
+                profiling.merge(profile)
+                yield chunk_result
+        while pending:
+            chunk_result, unsaved, profile = pending.popleft().result()
+            encoder.save(*unsaved)
+            profiling.merge(profile)
+            yield chunk_result
+
+def parse_thresholds(value):
+    thresholds = sorted({float(t) for t in value.split(",") if t.strip()})
+    if not thresholds:
+        raise argparse.ArgumentTypeError("expected at least one threshold")
+    return thresholds
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Match scraped job postings against study-acquired skills.")
+    parser.add_argument("--model", default=MODEL_NAME,
+                        help=f"Sentence-transformers model name or local model directory (default: {MODEL_NAME})")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (default: 1)")
+    parser.add_argument("--shard-size", type=int, default=None,
+                        help=f"Postings per work item (default: {JOB_CHUNK_SIZE}, or {SHARD_SIZE} with --workers > 1)")
+    parser.add_argument("--thresholds", type=parse_thresholds, default=None,
+                        help="Comma-separated similarity thresholds to sweep in one pass, e.g. 0.4,0.45,0.5 "
+                             f"(default: {SIMILARITY_THRESHOLD}); outputs get a _t<threshold> suffix")
+    parser.add_argument("--skills", nargs="+", default=[SKILLS_PATH],
+                        help=f"One or more extracted skills JSON files whose skills are combined (default: {SKILLS_PATH})")
+    parser.add_argument("--index", choices=["dense", "exact", "ivf"], default="dense",
+                        help="dense: compare with every study skill (default); exact/ivf: top-k search in a study-skill index")
+    parser.add_argument("--top-k", type=int, default=TOP_K, help=f"Study skills considered per job skill with --index (default: {TOP_K})")
+    parser.add_argument("--n-probe", type=int, default=8, help="Clusters searched per query with --index ivf (default: 8)")
+    parser.add_argument("--report-recall", action="store_true",
+                        help="With --index ivf, measure recall against the exact index on a sample of job skills")
+    parser.add_argument("--precision", choices=PRECISIONS, default="float32",
+                        help="Storage and similarity precision of normalized embeddings with --index dense (default: float32)")
+    parser.add_argument("--report-flips", action="store_true",
+                        help="With --precision float16/int8, count match decisions that differ from float32")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only match postings added or changed since the previous --incremental run")
+    parser.add_argument("--store", default=RESULT_STORE, help=f"Result store used by --incremental (default: {RESULT_STORE})")
+    parser.add_argument("--parquet", metavar="DIR", default=None,
+                        help="Also write Parquet outputs, including every matched (job, job skill, study skill, score) "
+                             "edge, to DIR (requires pyarrow)")
+    profiling.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def report_index_recall(index, encoder, job_skills, top_k, threshold):
+    """Print the recall of an approximate index against exact search on a sample of job skills."""
+    sample = [normalize_skill(s) for s in job_skills[:RECALL_SAMPLE]]
+    if not sample:
+        return
+    queries = normalize_rows(encoder.encode(list(dict.fromkeys(sample)), batch_size=VOCAB_BATCH_SIZE))
+    approx, _ = index.search(queries, top_k, threshold)
+    exact, _ = ExactIndex(index.embeddings).search(queries, top_k, threshold)
+    print(f"Index recall@{top_k} vs exact search on {len(queries)} job skills: {recall(approx, exact):.4f}")
+
+def report_precision_flips(study_embeddings, encoder, job_skill_counter, precision, thresholds):
+    """Print how many job-skill match decisions change at a compact precision, per threshold."""
+    occurrences = {}
+    for skill, count in job_skill_counter.items():
+        key = normalize_skill(skill)
+        occurrences[key] = occurrences.get(key, 0) + count
+    skills = list(occurrences)
+    weights = np.fromiter(occurrences.values(), dtype=np.int64, count=len(occurrences))
+
+    totals = [Counter() for _ in thresholds]
+    for start in range(0, len(skills), JOB_CHUNK_SIZE):
+        embeddings = encoder.encode(skills[start:start + JOB_CHUNK_SIZE], batch_size=VOCAB_BATCH_SIZE)
+        for i, threshold in enumerate(thresholds):
+            totals[i].update(count_flips(embeddings, study_embeddings, precision, threshold,
+                                         weights[start:start + JOB_CHUNK_SIZE]))
+
+    for threshold, flips in zip(thresholds, totals):
+        print(f"{precision} vs float32 at threshold {threshold:g}: "
+              f"{flips['job_skill_flips']} of {flips['job_skill_decisions']} job-skill decisions flipped "
+              f"(+{flips['job_skills_gained']} / -{flips['job_skills_lost']}), "
+              f"{flips['pair_flips']} of {flips['pair_decisions']} (job skill, study skill) pairs flipped")
+
+def compare_all(encoder, matcher, chunk_size, workers, match_paths, total_study_skills, parquet=None):
+    """
+    Match every posting, writing each chunk's results to the match CSVs as soon as it is matched.
+
+    With parquet (a columnar.ParquetResults), each chunk's results and match
+    edges are also appended to the Parquet outputs.
+
+    Returns:
+        tuple: (per-study-skill match counts per threshold, job skill counter, number of jobs)
+    """
+    study_skill_match_counts = np.zeros((len(match_paths), total_study_skills), dtype=np.int64)  # For each study skill, how many jobs it matched
+    job_skill_counter = {}  # For each job skill, how many times it appears (across all jobs)
+    total_jobs = 0
+
+    # Stream postings, writing each chunk's results as soon as it is matched
+    from tqdm import tqdm
+
+    print(f"Processing job descriptions from {JOBS_PATH} in chunks of {chunk_size} ({workers} worker(s))...")
+    chunks = iter_chunks(iter_jobs(JOBS_PATH), chunk_size)
+    with tqdm(desc="Jobs", unit="job") as progress:
+        for chunk in iter_chunk_results(chunks, encoder, matcher, workers):
+            for results, path in zip(chunk.results_per_threshold, match_paths):
+                write_results(results, path, header=total_jobs == 0)
+            if parquet is not None:
+                with profiling.span("write.parquet", jobs=len(chunk.results_per_threshold[0])):
+                    parquet.write_chunk(chunk.results_per_threshold, chunk.vocabulary, chunk.edges)
+
+            study_skill_match_counts += np.asarray(chunk.study_skill_match_counts)
+            for skill, count in chunk.job_skill_counts.items():
+                job_skill_counter[skill] = job_skill_counter.get(skill, 0) + count
+            total_jobs += len(chunk.results_per_threshold[0])
+            progress.update(len(chunk.results_per_threshold[0]))
+
+    if total_jobs == 0:
+        for path in match_paths:
+            write_results([], path, header=True)
+    print(f"Done. Results for {total_jobs} jobs saved to: {', '.join(match_paths)}")
+    return study_skill_match_counts, job_skill_counter, total_jobs
+
+def compare_incremental(store, encoder, matcher, chunk_size, workers, match_paths):
+    """
+    Bring the result store up to date with the current postings and write the match CSVs from it.
+
+    Unchanged postings (same key and content hash) are skipped, new or changed
+    ones are matched, and postings missing from the input are subtracted.
+
+    Returns:
+        tuple: (per-study-skill match counts per threshold, job skill counter, number of jobs)
+    """
+    from tqdm import tqdm
+
+    pending = deque()  # (key, content hash, position, job skills) of postings sent for matching
+
+    def changed_jobs():
+        for position, job in enumerate(iter_jobs(JOBS_PATH)):
+            content_hash = store.make_key(job)
+            key = store.job_key(job, content_hash)
+            if store.is_current(key, content_hash):
+                store.touch(key, position)
+                continue
+            pending.append((key, content_hash, position, get_job_skill_texts(job)))
+            yield job
+
+    with tqdm(desc="Changed jobs", unit="job") as progress:
+        for chunk in iter_chunk_results(iter_chunks(changed_jobs(), chunk_size), encoder, matcher, workers):
+            results_per_threshold = chunk.results_per_threshold
+            for j, row in enumerate(results_per_threshold[0]):
+                key, content_hash, position, job_skills = pending.popleft()
+                store.put(key, content_hash, position, {
+                    "job_title": row["job_title"],
+                    "company": row["company"],
+                    "total_job_skills": row["total_job_skills"],
+                    "matched": [results[j]["matched_job_skills"] for results in results_per_threshold],
+                    "study_ids": [ids[j] for ids in chunk.job_study_ids],
+                    "job_skills": job_skills,
+                })
+            progress.update(len(results_per_threshold[0]))
+    store.remove_unseen()
+    store.commit()
+    print(f"Result store {store.path}: {store.added} added, {store.changed} changed, {store.removed} removed, "
+          f"{len(store)} postings" + (" (rebuilt: study skills or matching options changed)" if store.reset else ""))
+
+    for i, path in enumerate(match_paths):
+        header = True
+        for results in store.iter_results(i):
+            write_results(results, path, header=header)
+            header = False
+        if header:
+            write_results([], path, header=True)
+    print(f"Done. Results for {len(store)} jobs saved to: {', '.join(match_paths)}")
+
+    return store.study_skill_match_counts, store.job_skill_counter(), len(store)
+
+# === MAIN SCRIPT ===
+def main(argv=None):
+    args = parse_args(argv)
+    with profiling.session(args.profile, args.profile_trace):
+        run(args)
+
+def run(args):
+    """Match the job postings against the study skills and write every output."""
+    chunk_size = args.shard_size or (SHARD_SIZE if args.workers > 1 else JOB_CHUNK_SIZE)
+
+    # Prepare study-acquired skills (tech + soft) of every programme; job postings are streamed in chunks below
+    study_skills = load_study_skills(args.skills)
+
+    total_study_skills = len(study_skills)
+
+    # Model is loaded lazily, only for strings missing from the embedding cache
+    encoder = SkillEncoder(args.model)
+
+    # Encode study skills
+    print(f"Encoding {total_study_skills} study-acquired skills...")
+    study_embeddings = normalize_rows(encoder.encode([normalize_skill(s) for s in study_skills]))
+
+    thresholds = args.thresholds or [SIMILARITY_THRESHOLD]
+    sweep = args.thresholds is not None
+    if sweep and args.index != "dense":
+        raise SystemExit("--thresholds is only supported with --index dense")
+    if args.precision != "float32" and args.index != "dense":
+        raise SystemExit("--precision is only supported with --index dense")
+    if args.parquet and args.incremental:
+        raise SystemExit("--parquet is not supported with --incremental")
+
+    if args.index == "dense":
+        matcher = DenseMatcher(study_embeddings, thresholds, TILE_ROWS, args.precision, with_pairs=args.incremental,
+                               with_edges=bool(args.parquet))
+    else:
+        print(f"Building {args.index} index over {total_study_skills} study skills...")
+        index_options = {"n_probe": args.n_probe} if args.index == "ivf" else {}
+        index = build_index(args.index, study_embeddings, **index_options)
+        matcher = IndexMatcher(index, SIMILARITY_THRESHOLD, args.top_k, TILE_ROWS, with_pairs=args.incremental,
+                               with_edges=bool(args.parquet))
+
+    # Prepare results and statistics
+    match_paths = [threshold_path(OUTPUT_CSV, t, sweep) for t in thresholds]
+    if args.incremental:
+        config = {
+            "model": args.model, "study_skills": study_skills, "fields": JOB_SKILL_FIELDS, "thresholds": thresholds,
+            "index": args.index, "top_k": args.top_k, "n_probe": args.n_probe, "precision": args.precision,
+        }
+        store = ResultStore(args.store, config, len(thresholds), total_study_skills)
+        try:
+            print(f"Updating results from {JOBS_PATH} in chunks of {chunk_size} ({args.workers} worker(s))...")
+            study_skill_match_counts, job_skill_counter, total_jobs = compare_incremental(
+                store, encoder, matcher, chunk_size, args.workers, match_paths)
+        finally:
+            store.close()
+    else:
+        parquet = None
+        if args.parquet:
+            try:
+                parquet = ParquetResults(args.parquet, [threshold_path("job_skill_matches.parquet", t, sweep) for t in thresholds])
+            except ImportError as e:
+                raise SystemExit(str(e))
+        try:
+            study_skill_match_counts, job_skill_counter, total_jobs = compare_all(
+                encoder, matcher, chunk_size, args.workers, match_paths, total_study_skills, parquet)
+            if parquet is not None:
+                parquet.write_summaries(study_skills, study_skill_match_counts,
+                                        [threshold_path("study_skill_match_counts.parquet", t, sweep) for t in thresholds],
+                                        job_skill_counter)
+        finally:
+            if parquet is not None:
+                parquet.close()
+        if parquet is not None:
+            print(f"Parquet outputs saved to: {parquet.directory}")
+
+    if args.report_recall and args.index != "dense":
+        report_index_recall(matcher.index, encoder, list(job_skill_counter), args.top_k, SIMILARITY_THRESHOLD)
+    if args.report_flips and args.precision != "float32":
+        report_precision_flips(study_embeddings, encoder, job_skill_counter, args.precision, thresholds)
+
+    for threshold, counts in zip(thresholds, study_skill_match_counts.tolist()):
+        if sweep:
+            print(f"\n=== Threshold {threshold:g} ===")
+        write_summary(study_skills, counts, job_skill_counter,
+                      threshold_path("job_skill_summary.txt", threshold, sweep),
+                      threshold_path("study_skill_match_counts.csv", threshold, sweep))
+
+    # Job skills with frequencies (independent of the threshold)
+    import pandas as pd
 
-    # 2. Job skills with frequencies
     job_skill_df = pd.DataFrame(list(job_skill_counter.items()), columns=['job_skill', 'frequency'])
     job_skill_df = job_skill_df.sort_values(by='frequency', ascending=False)
-    job_skill_df.to_csv('job_skill_frequencies.csv', index=False)
+    with profiling.span("write.csv", rows=len(job_skill_df)):
+        job_skill_df.to_csv('job_skill_frequencies.csv', index=False)
     print("Full job skill frequencies saved to: job_skill_frequencies.csv")
 
 if __name__ == "__main__":
@@ -0,0 +1,267 @@
+import hashlib
+import itertools
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no locking, so only one writing process per cache
+    fcntl = None
+
+
+class EmbeddingCache:
+    """
+    Persistent, append-only store of sentence embeddings keyed by (model name, text).
+
+    Each model gets its own directory holding:
+      - vectors.bin: a raw row-major matrix of embeddings, memory-mapped for reads
+      - keys.txt:    one content hash per row, in the same order as the matrix
+      - meta.json:   model name, embedding dimension and storage dtype
+
+    New vectors are appended to the end of both files, so a cache that is
+    interrupted mid-write is truncated to the rows present in both on the next load.
+    Opening the cache with a different model name, dimension or dtype never
+    reuses the stored vectors.
+
+    Several processes may share a cache: appends hold an exclusive lock on
+    .lock and number their rows from the file size, and keys appended by other
+    processes are read from the tail of keys.txt before the index is trusted.
+
+    A read_only cache (used by worker processes) never writes to disk: new
+    vectors are kept in memory and handed back with take_unsaved() so a single
+    writer can append them. With max_pending, only that many of them are kept,
+    least recently used first out, so a long-lived reader stays bounded.
+    """
+
+    def __init__(self, cache_dir, model_name: str, dtype: str = "float32", read_only: bool = False,
+                 max_pending: Optional[int] = None):
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.read_only = read_only
+        self.max_pending = max_pending
+        model_hash = hashlib.sha1(model_name.encode("utf-8")).hexdigest()[:16]
+        self.path = Path(cache_dir) / model_hash
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.vectors_file = self.path / "vectors.bin"
+        self.keys_file = self.path / "keys.txt"
+        self.meta_file = self.path / "meta.json"
+        self.lock_file = self.path / ".lock"
+
+        self.dim = None
+        self.index = {}
+        self.rows = 0  # Rows of vectors.bin covered by the keys read so far
+        self._keys_read = 0  # Bytes of keys.txt read so far
+        self._vectors = None
+        self.pending = {}  # key -> vector added by a read_only cache, least recently used first
+        self._unsaved = {}  # key -> text of pending entries not yet returned by take_unsaved
+        self._load()
+
+    @contextmanager
+    def _locked(self):
+        """Hold the cache's exclusive write lock (a no-op without fcntl)."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _stored_rows(self) -> int:
+        if self.dim is None or not self.vectors_file.exists():
+            return 0
+        return self.vectors_file.stat().st_size // (self.dim * self.dtype.itemsize)
+
+    def _load(self) -> None:
+        """Read the key index and validate the stored metadata."""
+        if self.read_only:
+            self._load_unlocked()
+            return
+        with self._locked():
+            self._load_unlocked()
+
+    def _load_unlocked(self) -> None:
+        if not self.meta_file.exists():
+            self._reset()
+            return
+
+        meta = json.loads(self.meta_file.read_text(encoding="utf-8"))
+        if meta.get("model_name") != self.model_name or meta.get("dtype") != self.dtype.name:
+            self._reset()
+            return
+
+        self.dim = meta["dim"]
+        data = self.keys_file.read_bytes() if self.keys_file.exists() else b""
+        keys = data.decode("utf-8").split("\n")[:-1]  # Complete lines only
+        stored_rows = self._stored_rows()
+        n_rows = min(len(keys), stored_rows)
+
+        # Drop a partially written tail so keys and vectors stay aligned (only under the write lock)
+        if not self.read_only and (n_rows != len(keys) or n_rows != stored_rows or not data.endswith(b"\n") and data):
+            with open(self.vectors_file, "ab") as f:
+                f.truncate(n_rows * self.dim * self.dtype.itemsize)
+            self.keys_file.write_text("".join(k + "\n" for k in keys[:n_rows]), encoding="utf-8")
+
+        self.index = {key: row for row, key in enumerate(keys[:n_rows])}
+        self.rows = n_rows
+        self._keys_read = sum(len(k) + 1 for k in keys[:n_rows])
+
+    def _refresh(self) -> None:
+        """
+        Index keys appended to keys.txt by other processes since the last read.
+
+        Vectors are written before their keys, so every complete key line has
+        its vector on disk.
+        """
+        if self.dim is None:
+            if not self.meta_file.exists():
+                return
+            meta = json.loads(self.meta_file.read_text(encoding="utf-8"))
+            if meta.get("model_name") != self.model_name or meta.get("dtype") != self.dtype.name:
+                return
+            self.dim = meta["dim"]
+        try:
+            with open(self.keys_file, "rb") as f:
+                f.seek(self._keys_read)
+                tail = f.read()
+        except FileNotFoundError:
+            return
+        complete = tail[:tail.rfind(b"\n") + 1]
+        if not complete:
+            return
+        for key in complete.decode("utf-8").split("\n")[:-1]:
+            self.index[key] = self.rows
+            self.rows += 1
+        self._keys_read += len(complete)
+
+    def _reset(self) -> None:
+        """Discard all stored entries."""
+        if self.read_only:
+            self.dim = None
+            self.index = {}
+            return
+        for file in (self.vectors_file, self.keys_file, self.meta_file):
+            file.unlink(missing_ok=True)
+        self.dim = None
+        self.index = {}
+        self.rows = 0
+        self._keys_read = 0
+        self._vectors = None
+
+    def __len__(self) -> int:
+        return len(self.index) + len(self.pending)
+
+    def key(self, text: str) -> str:
+        """Content hash of a text for the cached model."""
+        return hashlib.sha1(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Memory-mapped view of all stored vectors."""
+        if self._vectors is None or len(self._vectors) != self.rows:
+            if not self.rows:
+                return np.empty((0, self.dim or 0), dtype=self.dtype)
+            self._vectors = np.memmap(self.vectors_file, dtype=self.dtype, mode="r", shape=(self.rows, self.dim))
+        return self._vectors
+
+    def add(self, texts, embeddings) -> None:
+        """Append embeddings for texts that are not cached yet."""
+        embeddings = np.asarray(embeddings)
+        if self.read_only:
+            for text, vector in zip(texts, embeddings):
+                key = self.key(text)
+                if key not in self.index and key not in self.pending:
+                    self.pending[key] = np.asarray(vector, dtype=self.dtype)
+                    self._unsaved[key] = text
+            return
+
+        with self._locked():
+            # Rows are numbered from what is on disk, including other processes' appends
+            self._refresh()
+            if self.dim is None:
+                self.dim = int(embeddings.shape[1])
+                self.meta_file.write_text(
+                    json.dumps({"model_name": self.model_name, "dim": self.dim, "dtype": self.dtype.name}),
+                    encoding="utf-8",
+                )
+
+            new_keys = {}  # key -> vector, in order
+            for text, vector in zip(texts, embeddings):
+                key = self.key(text)
+                if key not in self.index:
+                    new_keys.setdefault(key, vector)
+            if not new_keys:
+                return
+
+            first_row = self._stored_rows()
+            if first_row != self.rows:
+                raise RuntimeError(f"Embedding cache {self.path} is inconsistent: {self.rows} keys but {first_row} vectors")
+            # Vectors first, then keys: a crash in between leaves an orphan tail that _load drops
+            with open(self.vectors_file, "ab") as f:
+                f.write(np.asarray(list(new_keys.values()), dtype=self.dtype).tobytes())
+            data = "".join(k + "\n" for k in new_keys).encode("utf-8")
+            with open(self.keys_file, "ab") as f:
+                f.write(data)
+            for row, key in enumerate(new_keys, first_row):
+                self.index[key] = row
+            self.rows += len(new_keys)
+            self._keys_read += len(data)
+
+    def encode(self, texts, encode_fn) -> np.ndarray:
+        """
+        Return float32 embeddings for texts, encoding only the ones missing from the cache.
+
+        Args:
+            texts: Strings to embed
+            encode_fn: Callable that encodes a list of strings into an (n, dim) array
+
+        Returns:
+            np.ndarray: Embeddings in the same order as texts
+        """
+        self._refresh()
+        missing = list(dict.fromkeys(t for t in texts if self.key(t) not in self.index and self.key(t) not in self.pending))
+        if missing:
+            self.add(missing, encode_fn(missing))
+
+        if not texts:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        if self.pending:
+            vectors = self.vectors
+            keys = list(map(self.key, texts))
+            embeddings = np.stack([
+                self.pending[key] if key in self.pending else vectors[self.index[key]]
+                for key in keys
+            ]).astype(np.float32)
+            if self.max_pending is not None:
+                self._trim_pending(keys)
+            return embeddings
+        rows = np.fromiter((self.index[self.key(t)] for t in texts), dtype=np.int64, count=len(texts))
+        return np.asarray(self.vectors[rows], dtype=np.float32)
+
+    def _trim_pending(self, used_keys) -> None:
+        """Mark used_keys as recently used and drop the oldest in-memory entries beyond max_pending."""
+        for key in used_keys:
+            if key in self.pending:
+                self.pending[key] = self.pending.pop(key)
+        for key in list(itertools.islice(self.pending, max(0, len(self.pending) - self.max_pending))):
+            del self.pending[key]
+            self._unsaved.pop(key, None)
+
+    def take_unsaved(self):
+        """
+        Return and forget the entries a read_only cache added since the last call.
+
+        Returns:
+            tuple: (texts, float32 embeddings) to be written by the owning process
+        """
+        unsaved, self._unsaved = self._unsaved, {}
+        if not unsaved:
+            return [], np.empty((0, self.dim or 0), dtype=np.float32)
+        return list(unsaved.values()), np.stack([self.pending[key] for key in unsaved]).astype(np.float32)
@@ -1,26 +1,27 @@
+import json
 import os
-from openai import OpenAI
+import random
+import threading
+import time
+from typing import List
+from loguru import logger
+from pydantic import ValidationError
 
-from models import ExtractedSkills
+import profiling
+from models import ExtractedSkills, ExtractedSkillsBatch
+from rate_limit import TokenBucket
+from request_plan import CHUNK_OVERLAP_TOKENS, MAX_REQUEST_TOKENS, Part, count_tokens, split_text
+from response_cache import ResponseCache
 import dotenv
 dotenv.load_dotenv()
 
-class SkillExtractor:
-    def __init__(self, api_key: str = None):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY") if api_key is None else api_key)
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0  # Seconds; doubled after every failed attempt
+BACKOFF_MAX = 60.0
+MODEL = "gpt-4.1-nano"  # DONT CHANGE THIS!!!
+TEMPERATURE = 0.1  # Low temperature for consistent results
 
-    def extract_skills_from_text(self, text: str) -> ExtractedSkills:
-        """
-        Extract technologies and skills from academic document text.
-
-        Args:
-            text: The text content of the academic document
-
-        Returns:
-            ExtractedSkills: Structured object containing categorized skills
-        """
-
-        system_prompt = """
+SYSTEM_PROMPT = """
         You are an expert in analyzing academic documents and extracting professional skills in a format suitable for job portals like pracuj.pl.
         Your task is to analyze the syllabus/course description and extract:
         
@@ -42,27 +43,238 @@ class SkillExtractor:
         Make skill names concise and professional - as they would appear on pracuj.pl job offers.
         """
 
-        user_prompt = f"""
+def document_prompt(text: str) -> str:
+    """User prompt asking for the skills of one document (or one chunk of it)."""
+    return f"""
         Analyze the following academic syllabus text and extract all technologies and skills in a job-portal format:
         
         {text}
         """
 
+def batch_prompt(texts: List[str]) -> str:
+    """User prompt asking for the skills of several documents, one ExtractedSkills each."""
+    documents = "\n".join(f'<document id="{i}">\n{text}\n</document>' for i, text in enumerate(texts, 1))
+    return f"""
+        Analyze each of the following {len(texts)} academic syllabus texts separately and extract all technologies and skills in a job-portal format.
+        Return exactly one entry in "documents" per <document>, in the same order, using only that document's text.
+        
+        {documents}
+        """
+
+def merge_chunks(chunks: List[ExtractedSkills]) -> ExtractedSkills:
+    """
+    Combine the skills extracted from the chunks of one document.
+
+    Names are deduplicated case-insensitively, keeping the first occurrence, so
+    a skill seen in the overlap of two chunks counts once for the document.
+    """
+    technologies = {}
+    soft_skills = {}
+    for skills in chunks:
+        for tech in skills.technologies:
+            technologies.setdefault(tech.name.lower().strip(), tech)
+        for skill in skills.soft_skills:
+            soft_skills.setdefault(skill.name.lower().strip(), skill)
+    titles = [skills.document_title for skills in chunks if skills.document_title and skills.document_title != "Error"]
+    return ExtractedSkills(technologies=list(technologies.values()), soft_skills=list(soft_skills.values()),
+                           document_title=titles[0] if titles else "")
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and network failures are worth retrying."""
+    from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+
+    if isinstance(error, (RateLimitError, APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before the next attempt: Retry-After if given, else exponential backoff with jitter."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
         try:
-            response = self.client.beta.chat.completions.parse(
-                model="gpt-4.1-nano",  # DONT CHANGE THIS!!!
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                response_format=ExtractedSkills,
-                temperature=0.1,  # Low temperature for consistent results
-            )
-
-            return response.choices[0].message.parsed
-
-        except Exception as e:
-            print(f"Error processing text: {e}")
-            return ExtractedSkills(
-                technologies=[], soft_skills=[], document_title="Error"
-            )
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    delay = min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+class SkillExtractor:
+    def __init__(self, api_key: str = None, base_url: str = None, rate_limiter: TokenBucket = None,
+                 max_retries: int = MAX_RETRIES, cache: ResponseCache = None,
+                 max_request_tokens: int = MAX_REQUEST_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS):
+        """
+        Args:
+            api_key: OpenAI API key (defaults to OPENAI_API_KEY)
+            base_url: Alternative OpenAI-compatible endpoint (defaults to OPENAI_BASE_URL or the OpenAI API)
+            rate_limiter: Optional token bucket shared by all threads using this extractor
+            max_retries: Attempts after the first one for 429/5xx/network errors
+            cache: Optional response cache; identical requests are answered without calling the API
+            max_request_tokens: Longer documents are split into chunks of at most this many tokens
+            overlap_tokens: Tokens repeated between consecutive chunks of a split document
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self._client = None
+        self._client_lock = threading.Lock()
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.cache = cache
+        self.max_request_tokens = max_request_tokens
+        self.overlap_tokens = overlap_tokens
+
+    @property
+    def client(self):
+        """OpenAI client, created on first use so runs answered from the cache never import openai."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+
+                    # Retries are handled here, with the rate limiter, rather than inside the client
+                    self._client = OpenAI(
+                        api_key=os.getenv("OPENAI_API_KEY") if self.api_key is None else self.api_key,
+                        base_url=self.base_url,
+                        max_retries=0,
+                    )
+        return self._client
+
+    def extract_skills_from_text(self, text: str) -> ExtractedSkills:
+        """
+        Extract technologies and skills from academic document text.
+
+        A document longer than max_request_tokens is split into overlapping
+        chunks, which are extracted one by one and merged.
+
+        Args:
+            text: The text content of the academic document
+
+        Returns:
+            ExtractedSkills: Structured object containing categorized skills, or None if the model refused
+
+        Raises:
+            openai.OpenAIError: If the request still fails after retries, or fails with a non-retryable error
+        """
+        if count_tokens(text) <= self.max_request_tokens:
+            return self._parse(document_prompt(text), ExtractedSkills)
+        chunks = split_text(text, self.max_request_tokens, self.overlap_tokens)
+        profiling.count("extract.chunks", len(chunks))
+        # A refused chunk (parsed is None) is left out rather than losing the whole document
+        extracted = [skills for skills in (self._parse(document_prompt(chunk), ExtractedSkills) for chunk in chunks)
+                     if skills is not None]
+        return merge_chunks(extracted) if extracted else None
+
+    def extract_parts(self, parts: List[Part]) -> List[ExtractedSkills]:
+        """
+        Extract the skills of every part of a planned request (see request_plan.plan_requests).
+
+        Each part is first looked up in the cache on its own, so adding or
+        editing one document does not invalidate the others packed with it.
+        The remaining parts are sent in one request and come back as one
+        ExtractedSkills each, which are cached per part. If that request fails
+        or does not hold exactly one entry per part, each part is sent again
+        on its own; a part that then fails is None.
+
+        Returns:
+            list: One ExtractedSkills (or None) per part, in order
+        """
+        keys = [self._cache_key(document_prompt(part.text), ExtractedSkills) for part in parts]
+        results = [self._cached(key, ExtractedSkills) for key in keys]
+        missing = [i for i, skills in enumerate(results) if skills is None]
+        if len(missing) > 1:
+            try:
+                batch = self._request(batch_prompt([parts[i].text for i in missing]), ExtractedSkillsBatch)
+            except Exception as e:
+                batch = None
+                profiling.count("extract.batch_failures")
+                logger.warning(f"Packed request of {len(missing)} documents failed ({e.__class__.__name__}: {e}); "
+                               f"sending them one by one")
+            if batch is not None and len(batch.documents) == len(missing):
+                profiling.count("extract.packed_parts", len(missing))
+                for i, skills in zip(missing, batch.documents):
+                    results[i] = skills
+                    self._store(keys[i], skills)
+                missing = []
+            elif batch is not None:
+                profiling.count("extract.batch_mismatches")
+                logger.warning(f"Expected {len(missing)} documents in a packed response, got "
+                               f"{len(batch.documents)}; sending them one by one")
+
+        for i in missing:
+            try:
+                results[i] = self._parse(document_prompt(parts[i].text), ExtractedSkills)
+            except Exception as e:
+                if len(parts) == 1:
+                    raise
+                logger.error(f"Part {i + 1} of {len(parts)} of a packed request failed: {e}")
+        return results
+
+    def _cache_key(self, user_prompt: str, response_format):
+        """Cache key of a request, or None without a cache."""
+        if self.cache is None:
+            return None
+        # The key covers everything that determines the response, including the document text and the response schema
+        schema = json.dumps(response_format.model_json_schema(), sort_keys=True)
+        return ResponseCache.make_key(MODEL, SYSTEM_PROMPT, TEMPERATURE, schema, user_prompt)
+
+    def _cached(self, cache_key, response_format):
+        """The cached response for cache_key, or None on a miss (an entry that no longer validates is dropped)."""
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            try:
+                skills = response_format.model_validate_json(cached)
+                profiling.count("llm.cache_hits")
+                return skills
+            except ValidationError:
+                logger.warning(f"Cached {response_format.__name__} response no longer validates; requesting it again")
+                self.cache.invalidate(cache_key)
+        profiling.count("llm.cache_misses")
+        return None
+
+    def _store(self, cache_key, skills) -> None:
+        if cache_key is not None and skills is not None:
+            self.cache.put(cache_key, skills.model_dump_json())
+
+    def _parse(self, user_prompt: str, response_format):
+        """Send one structured-output request (through the cache, rate limiter and retries) and return the parsed response."""
+        cache_key = self._cache_key(user_prompt, response_format)
+        skills = self._cached(cache_key, response_format)
+        if skills is None:
+            skills = self._request(user_prompt, response_format)
+            self._store(cache_key, skills)
+        return skills
+
+    def _request(self, user_prompt: str, response_format):
+        """Send one structured-output request through the rate limiter and retries, bypassing the cache."""
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                with profiling.span("llm.rate_limit_wait"):
+                    self.rate_limiter.acquire()
+            try:
+                profiling.count("llm.requests")
+                with profiling.span("llm.request", attempt=attempt):
+                    response = self.client.beta.chat.completions.parse(
+                        model=MODEL,
+                        messages=[
+                            {"role": "system", "content": SYSTEM_PROMPT},
+                            {"role": "user", "content": user_prompt},
+                        ],
+                        response_format=response_format,
+                        temperature=TEMPERATURE,
+                    )
+                if response.usage is not None:
+                    profiling.count("llm.prompt_tokens", response.usage.prompt_tokens)
+                    profiling.count("llm.completion_tokens", response.usage.completion_tokens)
+                return response.choices[0].message.parsed
+
+            except Exception as e:
+                profiling.count(f"llm.errors.{e.__class__.__name__}")
+                if not is_retryable(e) or attempt == self.max_retries:
+                    raise
+                profiling.count("llm.retries")
+                delay = retry_delay(e, attempt)
+                logger.warning(f"Request failed ({e.__class__.__name__}), retrying in {delay:.1f}s "
+                               f"(attempt {attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
@@ -0,0 +1,103 @@
+import json
+from itertools import islice
+from pathlib import Path
+
+READ_SIZE = 1 << 20  # Characters read from disk per step
+JSONL_SUFFIXES = {".jsonl", ".ndjson"}
+
+
+def iter_jobs(path):
+    """
+    Yield job postings one at a time from a scraped job dump.
+
+    Supports a top-level JSON array (the scraper's job_descriptions.json) and
+    JSON Lines (one posting per line). The format is taken from the file suffix,
+    falling back to the first non-whitespace character.
+
+    Args:
+        path: Path to the .json or .jsonl file
+
+    Yields:
+        dict: One job posting
+    """
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix.lower() in JSONL_SUFFIXES or _peek_first_char(f) != "[":
+            yield from _iter_json_lines(f)
+        else:
+            yield from _iter_json_array(f)
+
+
+def iter_chunks(iterable, size):
+    """Group an iterable into lists of at most size items."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _peek_first_char(f):
+    """Return the first non-whitespace character and rewind the file."""
+    while chunk := f.read(4096):
+        stripped = chunk.lstrip()
+        if stripped:
+            f.seek(0)
+            return stripped[0]
+    f.seek(0)
+    return ""
+
+
+def _iter_json_lines(f):
+    for line_number, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e}") from e
+
+
+def _iter_json_array(f):
+    """Incrementally decode the elements of a top-level JSON array."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        # Skip whitespace and separators between elements
+        while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+            pos += 1
+
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array of job postings")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                # A value ending exactly at the buffer edge may be truncated (e.g. a number)
+                if end < len(buffer) or eof:
+                    yield item
+                    pos = end
+                    continue
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+
+        if eof:
+            raise ValueError("Unexpected end of file while reading the JSON array")
+
+        # Drop consumed text and read more
+        buffer = buffer[pos:]
+        pos = 0
+        chunk = f.read(READ_SIZE)
+        if chunk:
+            buffer += chunk
+        else:
+            eof = True
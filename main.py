@@ -1,65 +1,132 @@
-from markitdown import MarkItDown
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from loguru import logger
 from pathlib import Path
-import re
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import profiling
+from sections import detect_language, iter_outcomes
+
+MANIFEST_NAME = ".manifest.json"
+
+_converter = None
 
 def extract_polish_content(text):
     """
     Extracts the 'treść' column content from the 'Przedmiotowe efekty uczenia się' section
     for every syllabus item in the Polish document.
     """
-    # Regex to find all occurrences of the "Przedmiotowe efekty uczenia się" section
-    # and capture the content until the next major section.
-    syllabus_sections = re.findall(r'Przedmiotowe efekty uczenia się\s*(.*?)(?=\nTreści programowe zapewniające uzyskanie efektów uczenia się|\Z)', text, re.DOTALL)
-    
-    extracted_data = []
-    for section in syllabus_sections:
-        # This updated regex is more robust. Instead of matching headers, it directly
-        # finds the content between the 'PEU' code (start of the row) and the 'K2_IZ'
-        # code (start of the next column), which is a more reliable pattern.
-        contents = re.findall(r'PEU[ _]?[WUK]\d+\s*(.*?)(?=\s*K2[ _]?IZ)', section, re.DOTALL)
-        for content in contents:
-            # Clean up the captured content by removing potential junk characters
-            # like quotes and commas from the start and end, and normalizing whitespace.
-            cleaned_content = content.strip().strip('",')
-            cleaned_content = ' '.join(cleaned_content.split())
-
-            if cleaned_content:
-                extracted_data.append(cleaned_content)
-    
-    return "\n\n".join(extracted_data)
+    return "\n\n".join(iter_outcomes(text, "pl"))
 
 def extract_english_content(text):
     """
     Extracts the 'Content' from the 'Subject's learning outcomes' tables in the English document.
     """
-    # Regex to find all "Subject's learning outcomes" sections and their content
-    # until the next major section heading.
-    learning_outcomes_sections = re.findall(r"Subject's learning outcomes\s*(.*?)(?=\nProgram content ensuring learning outcomes|\Z)", text, re.DOTALL)
-    
-    extracted_data = []
-    for section in learning_outcomes_sections:
-        # Regex to find the content under the "Content" column for each outcome.
-        # This regex looks for a PEU code, then lazily captures all characters
-        # until it finds a K2_IZ code, which is robust to formatting variations.
-        contents = re.findall(r"PEU_\w+\d+\s*(.*?)(?=\s*K2[ _]?IZ)", section, re.DOTALL)
-        for content in contents:
-            # Clean up the captured content by removing potential junk characters
-            # like quotes and commas from the start and end, and normalizing whitespace.
-            cleaned_content = content.strip().strip('",')
-            cleaned_content = ' '.join(cleaned_content.split())
-
-            if cleaned_content:
-                extracted_data.append(cleaned_content)
-                
-    return "\n\n".join(extracted_data)
-
-def main():
+    return "\n\n".join(iter_outcomes(text, "en"))
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(path):
+    """Load the conversion manifest ({pdf name: entry}), or an empty one."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(path, manifest):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+def is_up_to_date(file, entry, output_file):
+    """
+    Check whether a PDF still matches its manifest entry.
+
+    Size and mtime are compared first; the content hash is only computed when
+    they differ, so a touched but unchanged file is not converted again.
+    """
+    if not entry or not output_file.exists():
+        return False
+    stat = file.stat()
+    if entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    if entry.get("sha256") == file_hash(file):
+        entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        return True
+    return False
+
+def convert_pdf(file):
+    """
+    Convert one PDF and extract its learning outcomes. Runs in a worker process.
+
+    Returns:
+        dict: language, extracted text and timings for the file
+    """
+    global _converter
+    start = time.perf_counter()
+    if _converter is None:
+        # Imported here so runs with nothing to convert never pay for it
+        with profiling.span("pdf.load_converter"):
+            from markitdown import MarkItDown
+            _converter = MarkItDown()
+
+    # Convert the entire PDF to text first
+    with profiling.span("pdf.convert", file=file.name):
+        full_text = _converter.convert(file).text_content
+    converted = time.perf_counter()
+
+    # Determine the language and apply the correct extraction function
+    with profiling.span("pdf.extract", file=file.name):
+        language = detect_language(full_text)
+        if language == "pl":
+            extracted_text = extract_polish_content(full_text)
+        elif language == "en":
+            extracted_text = extract_english_content(full_text)
+        else:
+            extracted_text = full_text
+    profiling.count("pdf.bytes", file.stat().st_size)
+    profiling.count("pdf.text_chars", len(full_text))
+
+    return {
+        "language": language,
+        "text": extracted_text,
+        "convert_seconds": converted - start,
+        "extract_seconds": time.perf_counter() - converted,
+        "profile": profiling.snapshot(),
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert syllabus PDFs to markdown with their learning outcomes.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of conversion processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Convert every PDF, even if it is unchanged")
+    profiling.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """
     Main function to process PDF files in the input directory, convert them to markdown,
     and write the results to the output directory.
+
+    PDFs whose size/mtime or content hash match the manifest from a previous run,
+    and whose markdown output still exists, are skipped. The rest are converted in
+    a process pool.
     """
-    md = MarkItDown()
+    args = parse_args(argv)
+    with profiling.session(args.profile, args.profile_trace):
+        convert_all(args)
+
+def convert_all(args):
+    """Convert the new or changed PDFs in input/ and update the manifest."""
     input_dir = Path("input")
     output_dir = Path("output")
     output_dir.mkdir(exist_ok=True)
@@ -71,32 +138,68 @@ def main():
         logger.info("Please add your PDF files to the 'input' directory and run the script again.")
         return
 
-    for file in input_dir.iterdir():
-        if file.suffix.lower() == '.pdf':
-            logger.info(f"Processing {file.name}")
-            try:
-                # Convert the entire PDF to text first
-                result = md.convert(file)
-                full_text = result.text_content
-                
-                # Determine the language and apply the correct extraction function
-                if "Przedmiotowe efekty uczenia się" in full_text:
-                    logger.info(f"Detected Polish document. Extracting specific content.")
-                    extracted_text = extract_polish_content(full_text)
-                elif "Subject's learning outcomes" in full_text:
-                    logger.info(f"Detected English document. Extracting specific content.")
-                    extracted_text = extract_english_content(full_text)
-                else:
-                    logger.warning(f"Could not determine the document type for {file.name}. Skipping specific extraction.")
-                    extracted_text = full_text
-
-                # Write the extracted text to the output file
-                output_file = output_dir / f"{file.stem}.md"
-                output_file.write_text(extracted_text, encoding="utf-8")
-                logger.success(f"Converted {file.name} -> {output_file.name}")
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    pdf_files = sorted(file for file in input_dir.iterdir() if file.suffix.lower() == '.pdf')
+
+    # Forget PDFs that were removed from the input directory
+    for name in set(manifest) - {file.name for file in pdf_files}:
+        del manifest[name]
 
+    to_convert = []
+    with profiling.span("manifest.check", files=len(pdf_files)):
+        for file in pdf_files:
+            output_file = output_dir / f"{file.stem}.md"
+            if not args.force and is_up_to_date(file, manifest.get(file.name), output_file):
+                logger.debug(f"Skipping unchanged {file.name}")
+            else:
+                to_convert.append(file)
+    profiling.count("pdf.skipped", len(pdf_files) - len(to_convert))
+
+    logger.info(f"{len(pdf_files) - len(to_convert)} unchanged, {len(to_convert)} to convert")
+    if not to_convert:
+        save_manifest(manifest_path, manifest)
+        return
+
+    workers = max(1, min(args.workers, len(to_convert)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=profiling.init_worker,
+                             initargs=profiling.worker_config()) as executor:
+        futures = {executor.submit(convert_pdf, file): file for file in to_convert}
+        for future in as_completed(futures):
+            file = futures[future]
+            try:
+                result = future.result()
             except Exception as e:
                 logger.error(f"Failed to process {file.name}. Error: {e}")
+                profiling.count("pdf.failed")
+                continue
+            profiling.merge(result["profile"])
+            profiling.count("pdf.converted")
+
+            if result["language"] == "pl":
+                logger.info(f"Detected Polish document {file.name}. Extracted specific content.")
+            elif result["language"] == "en":
+                logger.info(f"Detected English document {file.name}. Extracted specific content.")
+            else:
+                logger.warning(f"Could not determine the document type for {file.name}. Skipping specific extraction.")
+
+            # Write the extracted text to the output file
+            output_file = output_dir / f"{file.stem}.md"
+            output_file.write_text(result["text"], encoding="utf-8")
+
+            stat = file.stat()
+            manifest[file.name] = {
+                "path": str(file),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": file_hash(file),
+                "language": result["language"],
+                "output": str(output_file),
+            }
+            logger.success(f"Converted {file.name} -> {output_file.name} "
+                           f"(convert {result['convert_seconds']:.2f}s, extract {result['extract_seconds']:.2f}s)")
+
+    save_manifest(manifest_path, manifest)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,401 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+import profiling
+from quantize import QuantizedEmbeddings
+
+TILE_ROWS = 8192  # Job-skill rows per similarity tile; peak memory is tile_rows x study skills
+
+
+@dataclass
+class MatchResult:
+    """Per-job and per-study-skill outcome of matching a job corpus against study skills."""
+
+    matched_job_skills: np.ndarray  # (jobs,) job skills with at least one study skill above threshold
+    matched_study_skills: np.ndarray  # (jobs,) distinct study skills hit by each job
+    study_skill_match_counts: np.ndarray  # (study skills,) number of jobs each study skill matched
+    # (job ids, study skill ids) of every matched (job, study skill) pair, sorted by job; only when requested
+    job_study_pairs: Optional[tuple] = None
+    # (job ids, embedding rows, study skill ids, scores) of every matching job skill, sorted by job; only when requested
+    edges: Optional[tuple] = None
+
+
+def normalize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so dot products are cosine similarities."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+def build_offsets(job_skill_indices):
+    """
+    Flatten per-job embedding indices into CSR form.
+
+    Args:
+        job_skill_indices: For each job, the embedding row of each of its skills
+
+    Returns:
+        tuple: (rows, offsets) where the skills of job j are rows[offsets[j]:offsets[j + 1]]
+    """
+    lengths = np.fromiter((len(indices) for indices in job_skill_indices), dtype=np.int64, count=len(job_skill_indices))
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    rows = np.fromiter((i for indices in job_skill_indices for i in indices), dtype=np.int64, count=int(offsets[-1]))
+    return rows, offsets
+
+
+def iter_tiles(offsets: np.ndarray, tile_rows: int = TILE_ROWS):
+    """
+    Split jobs into consecutive ranges of whole jobs holding at most tile_rows skill rows.
+
+    A single job with more than tile_rows skills gets a tile of its own.
+
+    Yields:
+        tuple: (job_start, job_end) half-open job range
+    """
+    n_jobs = len(offsets) - 1
+    start = 0
+    while start < n_jobs:
+        # Last job whose end still fits in the tile, but always take at least one job
+        end = int(np.searchsorted(offsets, offsets[start] + tile_rows, side="right")) - 1
+        end = min(max(end, start + 1), n_jobs)
+        yield start, end
+        start = end
+
+
+def collect_pairs(job_ids, study_ids):
+    """Concatenate per-tile (job, study skill) pair arrays into one pair of arrays."""
+    if not job_ids:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(job_ids), np.concatenate(study_ids)
+
+
+def tile_edges(job_start, tile_offsets, tile_row_ids, local_rows, study_ids, scores, n_rows, n_study):
+    """
+    (job, embedding row, study skill, score) edges of one tile.
+
+    A job listing the same skill twice gets its edges once.
+
+    Args:
+        job_start: First job of the tile
+        tile_offsets: offsets[job_start:job_end + 1]
+        tile_row_ids: Embedding row of each job skill in the tile
+        local_rows, study_ids, scores: Tile row, study skill and similarity of each match
+
+    Returns:
+        tuple: (job_ids, rows, study_ids, scores) sorted by job, row and study skill
+    """
+    job_of_row = job_start + np.repeat(np.arange(len(tile_offsets) - 1), np.diff(tile_offsets))
+    job_ids, row_ids = job_of_row[local_rows], tile_row_ids[local_rows]
+    _, first = np.unique((job_ids * n_rows + row_ids) * n_study + study_ids, return_index=True)
+    return job_ids[first], row_ids[first], study_ids[first], scores[first]
+
+
+def collect_edges(edges):
+    """Concatenate per-tile edge tuples (see tile_edges) into one tuple of arrays."""
+    if not edges:
+        return (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.float32))
+    return tuple(np.concatenate(column) for column in zip(*edges))
+
+
+def tile_scorer(embeddings, study_embeddings):
+    """
+    Return a function scoring a tile of embedding rows against every study skill.
+
+    Both sides are either float arrays or QuantizedEmbeddings; compact tiles are
+    upcast to float32 only for the duration of the tile.
+
+    Returns:
+        tuple: (score_rows, n_study) where score_rows(row_ids) is (rows, study skills) float32
+    """
+    if isinstance(study_embeddings, QuantizedEmbeddings):
+        def score_rows(row_ids):
+            with profiling.span("match.similarity", rows=len(row_ids)):
+                return embeddings.take(row_ids).similarity(study_embeddings)
+        return score_rows, len(study_embeddings)
+
+    study_t = np.ascontiguousarray(np.asarray(study_embeddings, dtype=np.float32).T)
+
+    def score_rows(row_ids):
+        with profiling.span("match.similarity", rows=len(row_ids)):
+            return embeddings[row_ids] @ study_t
+    return score_rows, study_t.shape[1]
+
+
+def segment_starts(offsets: np.ndarray, job_start: int, job_end: int):
+    """
+    Local start rows of the non-empty jobs in a tile, for use with ufunc.reduceat.
+
+    reduceat cannot express empty segments, so empty jobs are masked out and
+    left at zero by the caller.
+
+    Returns:
+        tuple: (starts, nonempty) where nonempty is a boolean mask over the tile's jobs
+    """
+    tile_offsets = offsets[job_start:job_end + 1]
+    nonempty = np.diff(tile_offsets) > 0
+    starts = tile_offsets[:-1][nonempty] - tile_offsets[0]
+    return starts, nonempty
+
+
+def match_jobs(embeddings, rows, offsets, study_embeddings, threshold, tile_rows=TILE_ROWS, with_pairs=False,
+               with_edges=False) -> MatchResult:
+    """
+    Match every job's skills against the study skills in fixed-size tiles.
+
+    Args:
+        embeddings: Normalized embedding matrix (or QuantizedEmbeddings) the job skills index into
+        rows: Flattened embedding row of each job skill (see build_offsets)
+        offsets: CSR offsets mapping each job to its range in rows
+        study_embeddings: Normalized study-skill embeddings, in the same form as embeddings
+        threshold: Minimum cosine similarity for a match
+        tile_rows: Maximum number of job-skill rows per similarity tile
+        with_pairs: Also return every matched (job, study skill) pair
+        with_edges: Also return every matched (job, job skill, study skill) edge with its similarity
+
+    Returns:
+        MatchResult: Per-job match counts and per-study-skill job counts
+    """
+    n_jobs = len(offsets) - 1
+    score_rows, n_study = tile_scorer(embeddings, study_embeddings)
+
+    matched_job_skills = np.zeros(n_jobs, dtype=np.int64)
+    matched_study_skills = np.zeros(n_jobs, dtype=np.int64)
+    study_skill_match_counts = np.zeros(n_study, dtype=np.int64)
+    pair_jobs, pair_study = [], []
+    edges = []
+
+    for job_start, job_end in iter_tiles(offsets, tile_rows):
+        lo, hi = offsets[job_start], offsets[job_end]
+        if lo == hi:
+            continue
+        starts, nonempty = segment_starts(offsets, job_start, job_end)
+
+        sims = score_rows(rows[lo:hi])  # (tile rows, study skills)
+        hits = sims >= threshold
+
+        # A job skill matches if any study skill is above threshold
+        matched_job_skills[job_start:job_end][nonempty] = np.add.reduceat(hits.any(axis=1), starts)
+
+        # A study skill counts once per job it matched, whichever job skill hit it
+        job_study_hits = np.logical_or.reduceat(hits, starts, axis=0)  # (non-empty jobs, study skills)
+        matched_study_skills[job_start:job_end][nonempty] = job_study_hits.sum(axis=1)
+        study_skill_match_counts += job_study_hits.sum(axis=0)
+        if with_pairs:
+            local_jobs, study_ids = np.nonzero(job_study_hits)
+            pair_jobs.append(job_start + np.flatnonzero(nonempty)[local_jobs])
+            pair_study.append(study_ids)
+        if with_edges:
+            local_rows, study_ids = np.nonzero(hits)
+            edges.append(tile_edges(job_start, offsets[job_start:job_end + 1], rows[lo:hi], local_rows, study_ids,
+                                    sims[local_rows, study_ids], len(embeddings), n_study))
+
+    pairs = collect_pairs(pair_jobs, pair_study) if with_pairs else None
+    return MatchResult(matched_job_skills, matched_study_skills, study_skill_match_counts, pairs,
+                       collect_edges(edges) if with_edges else None)
+
+
+def match_jobs_with_index(embeddings, rows, offsets, index, threshold, top_k, tile_rows=TILE_ROWS,
+                          with_pairs=False, with_edges=False) -> MatchResult:
+    """
+    Match jobs using the top_k nearest study skills of each job skill from an index.
+
+    Every distinct embedding is searched once; job tiles then gather the
+    neighbour lists of their rows. Only neighbours among the top_k count, so
+    with an approximate index or a small top_k the counts are a lower bound of
+    the dense result.
+
+    Args:
+        embeddings: Normalized embedding matrix the job skills index into
+        rows: Flattened embedding row of each job skill (see build_offsets)
+        offsets: CSR offsets mapping each job to its range in rows
+        index: ExactIndex or IVFIndex over the normalized study-skill embeddings
+        threshold: Minimum cosine similarity for a match
+        top_k: Number of nearest study skills considered per job skill
+        with_pairs: Also return every matched (job, study skill) pair
+        with_edges: Also return every matched (job, job skill, study skill) edge with its similarity
+
+    Returns:
+        MatchResult: Per-job match counts and per-study-skill job counts
+    """
+    n_jobs = len(offsets) - 1
+    n_study = len(index)
+
+    matched_job_skills = np.zeros(n_jobs, dtype=np.int64)
+    matched_study_skills = np.zeros(n_jobs, dtype=np.int64)
+    study_skill_match_counts = np.zeros(n_study, dtype=np.int64)
+    pair_jobs, pair_study = [], []
+    edges = []
+    if n_study == 0:
+        pairs = collect_pairs(pair_jobs, pair_study) if with_pairs else None
+        return MatchResult(matched_job_skills, matched_study_skills, study_skill_match_counts, pairs,
+                           collect_edges(edges) if with_edges else None)
+
+    with profiling.span("index.search", queries=len(embeddings)):
+        neighbours, scores = index.search(embeddings, top_k, threshold)  # (embeddings, top_k), -1 if none
+
+    for job_start, job_end in iter_tiles(offsets, tile_rows):
+        lo, hi = offsets[job_start], offsets[job_end]
+        if lo == hi:
+            continue
+        starts, nonempty = segment_starts(offsets, job_start, job_end)
+        tile_neighbours = neighbours[rows[lo:hi]]  # (tile rows, top_k)
+
+        matched_job_skills[job_start:job_end][nonempty] = np.add.reduceat(tile_neighbours[:, 0] >= 0, starts)
+
+        # Distinct (job, study skill) pairs in the tile
+        job_of_row = np.repeat(np.arange(job_start, job_end), np.diff(offsets[job_start:job_end + 1]))
+        job_ids = np.broadcast_to(job_of_row[:, None], tile_neighbours.shape)[tile_neighbours >= 0]
+        study_ids = tile_neighbours[tile_neighbours >= 0]
+        pairs = np.unique(job_ids * n_study + study_ids)
+        matched_study_skills += np.bincount(pairs // n_study, minlength=n_jobs)
+        study_skill_match_counts += np.bincount(pairs % n_study, minlength=n_study)
+        if with_pairs:
+            pair_jobs.append(pairs // n_study)
+            pair_study.append(pairs % n_study)
+        if with_edges:
+            local_rows, ranks = np.nonzero(tile_neighbours >= 0)
+            edge_rows = rows[lo:hi]
+            edges.append(tile_edges(job_start, offsets[job_start:job_end + 1], edge_rows, local_rows,
+                                    tile_neighbours[local_rows, ranks], scores[edge_rows[local_rows], ranks],
+                                    len(embeddings), n_study))
+
+    pairs = collect_pairs(pair_jobs, pair_study) if with_pairs else None
+    return MatchResult(matched_job_skills, matched_study_skills, study_skill_match_counts, pairs,
+                       collect_edges(edges) if with_edges else None)
+
+
+def sweep_jobs(embeddings, rows, offsets, study_embeddings, thresholds, tile_rows=TILE_ROWS, with_pairs=False,
+               with_edges=False):
+    """
+    Match jobs at several thresholds from a single similarity computation.
+
+    Per tile, each job skill's max similarity over the study skills and each
+    (job, study skill) max similarity are computed once. searchsorted against
+    the sorted thresholds then gives the number of thresholds each value
+    clears, and histograms of those levels give the counts for every threshold.
+
+    Args:
+        embeddings: Normalized embedding matrix (or QuantizedEmbeddings) the job skills index into
+        rows: Flattened embedding row of each job skill (see build_offsets)
+        offsets: CSR offsets mapping each job to its range in rows
+        study_embeddings: Normalized study-skill embeddings, in the same form as embeddings
+        thresholds: Similarity thresholds, in any order
+        tile_rows: Maximum number of job-skill rows per similarity tile
+        with_pairs: Also return every matched (job, study skill) pair per threshold
+        with_edges: Also return every (job, job skill, study skill) edge at or above the lowest threshold, with its
+            similarity; every MatchResult shares them
+
+    Returns:
+        list: One MatchResult per threshold, in the order given
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float32)
+    order = np.argsort(thresholds, kind="stable")
+    sorted_thresholds = thresholds[order]
+    n_levels = len(thresholds) + 1
+
+    n_jobs = len(offsets) - 1
+    score_rows, n_study = tile_scorer(embeddings, study_embeddings)
+
+    # Columns follow sorted_thresholds until the end
+    matched_job_skills = np.zeros((n_jobs, len(thresholds)), dtype=np.int64)
+    matched_study_skills = np.zeros((n_jobs, len(thresholds)), dtype=np.int64)
+    study_skill_match_counts = np.zeros((len(thresholds), n_study), dtype=np.int64)
+    pair_jobs = [[] for _ in thresholds]
+    pair_study = [[] for _ in thresholds]
+    edges = []
+
+    for job_start, job_end in iter_tiles(offsets, tile_rows):
+        lo, hi = offsets[job_start], offsets[job_end]
+        if lo == hi or n_study == 0:
+            continue
+        starts, nonempty = segment_starts(offsets, job_start, job_end)
+        n_tile_jobs = len(starts)
+
+        sims = score_rows(rows[lo:hi])  # (tile rows, study skills)
+
+        # Job skills: level = number of thresholds the row's best similarity clears
+        row_levels = np.searchsorted(sorted_thresholds, sims.max(axis=1), side="right")
+        job_of_row = np.repeat(np.arange(n_tile_jobs), np.diff(np.append(starts, hi - lo)))
+        row_hist = np.bincount(job_of_row * n_levels + row_levels, minlength=n_tile_jobs * n_levels).reshape(n_tile_jobs, n_levels)
+        # Rows clearing threshold i are those with level > i: reverse cumulative sum over levels
+        matched_job_skills[job_start:job_end][nonempty] = np.cumsum(row_hist[:, ::-1], axis=1)[:, ::-1][:, 1:]
+
+        # (job, study skill) pairs: level of the best similarity over the job's rows
+        pair_levels = np.searchsorted(sorted_thresholds, np.maximum.reduceat(sims, starts, axis=0), side="right")
+        job_hist = np.bincount((np.arange(n_tile_jobs)[:, None] * n_levels + pair_levels).ravel(),
+                               minlength=n_tile_jobs * n_levels).reshape(n_tile_jobs, n_levels)
+        matched_study_skills[job_start:job_end][nonempty] = np.cumsum(job_hist[:, ::-1], axis=1)[:, ::-1][:, 1:]
+        study_hist = np.bincount((pair_levels * n_study + np.arange(n_study)).ravel(),
+                                 minlength=n_levels * n_study).reshape(n_levels, n_study)
+        study_skill_match_counts += np.cumsum(study_hist[::-1], axis=0)[::-1][1:]
+        if with_pairs:
+            tile_jobs = job_start + np.flatnonzero(nonempty)
+            for column in range(len(thresholds)):
+                local_jobs, study_ids = np.nonzero(pair_levels > column)
+                pair_jobs[column].append(tile_jobs[local_jobs])
+                pair_study[column].append(study_ids)
+        if with_edges:
+            local_rows, study_ids = np.nonzero(sims >= sorted_thresholds[0])
+            edges.append(tile_edges(job_start, offsets[job_start:job_end + 1], rows[lo:hi], local_rows, study_ids,
+                                    sims[local_rows, study_ids], len(embeddings), n_study))
+
+    edges = collect_edges(edges) if with_edges else None
+    results = [None] * len(thresholds)
+    for column, position in enumerate(order):
+        pairs = collect_pairs(pair_jobs[column], pair_study[column]) if with_pairs else None
+        results[position] = MatchResult(
+            matched_job_skills[:, column], matched_study_skills[:, column], study_skill_match_counts[column], pairs, edges
+        )
+    return results
+
+
+class DenseMatcher:
+    """
+    Matches job skills against every study skill (exact, tiled).
+
+    match() returns one MatchResult per threshold; with several thresholds
+    they all come from a single similarity pass (see sweep_jobs). With a
+    precision other than float32, both sides are kept in that compact form
+    (see quantize.QuantizedEmbeddings) and scored without expanding them.
+    """
+
+    def __init__(self, study_embeddings, thresholds, tile_rows=TILE_ROWS, precision="float32", with_pairs=False,
+                 with_edges=False):
+        self.precision = precision
+        self.with_pairs = with_pairs
+        self.with_edges = with_edges
+        if precision != "float32":
+            study_embeddings = QuantizedEmbeddings.from_float(study_embeddings, precision)
+        self.study_embeddings = study_embeddings
+        self.thresholds = list(thresholds)
+        self.tile_rows = tile_rows
+
+    def match(self, embeddings, rows, offsets):
+        if self.precision != "float32":
+            with profiling.span("quantize", rows=len(embeddings)):
+                embeddings = QuantizedEmbeddings.from_float(embeddings, self.precision)
+        if len(self.thresholds) == 1:
+            return [match_jobs(embeddings, rows, offsets, self.study_embeddings, self.thresholds[0], self.tile_rows,
+                               self.with_pairs, self.with_edges)]
+        return sweep_jobs(embeddings, rows, offsets, self.study_embeddings, self.thresholds, self.tile_rows,
+                          self.with_pairs, self.with_edges)
+
+
+class IndexMatcher:
+    """Matches job skills against their top_k nearest study skills from an index."""
+
+    def __init__(self, index, threshold, top_k, tile_rows=TILE_ROWS, with_pairs=False, with_edges=False):
+        self.index = index
+        self.thresholds = [threshold]
+        self.top_k = top_k
+        self.tile_rows = tile_rows
+        self.with_pairs = with_pairs
+        self.with_edges = with_edges
+
+    def match(self, embeddings, rows, offsets):
+        return [match_jobs_with_index(embeddings, rows, offsets, self.index, self.thresholds[0], self.top_k, self.tile_rows,
+                                      self.with_pairs, self.with_edges)]
@@ -1,10 +1,5 @@
 from pydantic import BaseModel, Field
 from typing import List
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
-
-load_dotenv()
 
 class TechnologySkill(BaseModel):
     name: str = Field(description="Specific technology name (e.g., 'Python', 'Docker', 'Azure', 'Kubernetes')")
@@ -18,3 +13,6 @@ class ExtractedSkills(BaseModel):
     technologies: List[TechnologySkill] = Field(description="List of technical skills and technologies")
     soft_skills: List[SoftSkill] = Field(description="List of soft skills and competencies")
     document_title: str = Field(description="Title or subject name from the document")
+
+class ExtractedSkillsBatch(BaseModel):
+    documents: List[ExtractedSkills] = Field(description="Extracted skills of each document, in the order the documents were given")
@@ -1,10 +1,23 @@
+import argparse
 import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Callable, Dict, List, Optional, Set
 from loguru import logger
+import numpy as np
 
-from extractor import SkillExtractor
+import profiling
+from extractor import SkillExtractor, merge_chunks
 from models import ExtractedSkills, TechnologySkill, SoftSkill
+from rate_limit import TokenBucket
+from request_plan import CHUNK_OVERLAP_TOKENS, MAX_DOCUMENTS_PER_REQUEST, MAX_REQUEST_TOKENS, Part, plan_requests
+from response_cache import ResponseCache
+from skill_merge import MERGE_THRESHOLD, merge_similar_skills
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_CACHE_PATH = Path(".llm_cache.sqlite")
+DEFAULT_ALIASES_PATH = Path("skill_aliases.json")
 
 
 class SkillDeduplicator:
@@ -14,6 +27,12 @@ class SkillDeduplicator:
         self.unique_technologies: Dict[str, TechnologySkill] = {}
         self.unique_soft_skills: Dict[str, SoftSkill] = {}
         self.document_titles: List[str] = []
+        # Number of documents each skill key was extracted from
+        self.technology_counts: Dict[str, int] = {}
+        self.soft_skill_counts: Dict[str, int] = {}
+        # Canonical name -> names merged into it by merge_similar()
+        self.technology_aliases: Dict[str, List[str]] = {}
+        self.soft_skill_aliases: Dict[str, List[str]] = {}
     
     def add_extracted_skills(self, skills: ExtractedSkills) -> None:
         """Add skills from a document to the deduplicated collection."""
@@ -23,16 +42,50 @@ class SkillDeduplicator:
             self.document_titles.append(skills.document_title)
         
         # Deduplicate technologies by name (case-insensitive)
+        for tech_key in {tech.name.lower().strip() for tech in skills.technologies}:
+            self.technology_counts[tech_key] = self.technology_counts.get(tech_key, 0) + 1
         for tech in skills.technologies:
             tech_key = tech.name.lower().strip()
             if tech_key and tech_key not in self.unique_technologies:
                 self.unique_technologies[tech_key] = tech
         
         # Deduplicate soft skills by name (case-insensitive)
+        for skill_key in {skill.name.lower().strip() for skill in skills.soft_skills}:
+            self.soft_skill_counts[skill_key] = self.soft_skill_counts.get(skill_key, 0) + 1
         for skill in skills.soft_skills:
             skill_key = skill.name.lower().strip()
             if skill_key and skill_key not in self.unique_soft_skills:
                 self.unique_soft_skills[skill_key] = skill
+
+    def merge_similar(self, encode: Callable[[List[str]], np.ndarray], threshold: float = MERGE_THRESHOLD) -> None:
+        """
+        Merge near-duplicate names (e.g. Polish/English pairs of the same competency) by embedding similarity.
+
+        Technologies and soft skills are clustered separately. Each cluster keeps
+        the entry extracted from the most documents; the other names are recorded
+        as its aliases.
+
+        Args:
+            encode: Returns L2-normalized embeddings for a list of skill names
+            threshold: Minimum cosine similarity for two names to be merged
+        """
+        for attr, counts, aliases in (("unique_technologies", self.technology_counts, self.technology_aliases),
+                                      ("unique_soft_skills", self.soft_skill_counts, self.soft_skill_aliases)):
+            skills = getattr(self, attr)
+            names = [skill.name for skill in skills.values()]
+            if not names:
+                continue
+            merged, new_aliases = merge_similar_skills(skills, counts, names, encode(names), threshold)
+            setattr(self, attr, merged)
+            for canonical, others in new_aliases.items():
+                merged_names = aliases.setdefault(canonical, [])
+                for other in others:
+                    merged_names.append(other)
+                    merged_names.extend(aliases.pop(other, []))
+
+    def get_aliases(self) -> Dict[str, Dict[str, List[str]]]:
+        """Names merged by merge_similar(), per canonical name."""
+        return {"technologies": self.technology_aliases, "soft_skills": self.soft_skill_aliases}
     
     def get_deduplicated_skills(self) -> ExtractedSkills:
         """Return the deduplicated skills as an ExtractedSkills object."""
@@ -43,61 +96,161 @@ class SkillDeduplicator:
         )
 
 
-def process_markdown_files(output_dir: Path) -> ExtractedSkills:
+def extract_request(extractor: SkillExtractor, parts: List[Part], labels: List[str]) -> Optional[List[ExtractedSkills]]:
+    """
+    Send one planned request (several small documents and chunks, or one chunk of a large document).
+
+    Args:
+        labels: File name (and chunk) of each part, for logging
+
+    Returns:
+        One ExtractedSkills per part, or None if the request could not be processed
+    """
+    names = ", ".join(labels)
+    logger.info(f"Processing {names}")
+
+    try:
+        with profiling.span("extract.request", parts=len(parts)):
+            return extractor.extract_parts(parts)
+    except Exception as e:
+        logger.error(f"Failed to process {names}: {e}")
+        return None
+
+
+def combine_document(md_file: Path, chunks: List[ExtractedSkills], failed_chunks: int) -> Optional[ExtractedSkills]:
+    """
+    Merge the skills extracted from the chunks of one document.
+
+    Returns:
+        ExtractedSkills, or None if no chunk of the file could be processed
+    """
+    if not chunks:
+        if failed_chunks:
+            profiling.count("extract.failed_files")
+        else:
+            logger.warning(f"{md_file.name} is empty; skipping it")
+        return None
+    if failed_chunks:
+        logger.warning(f"{failed_chunks} chunk(s) of {md_file.name} could not be processed; using the other {len(chunks)}")
+    extracted_skills = merge_chunks(chunks) if len(chunks) > 1 else chunks[0]
+
+    # Set document title from filename if not extracted
+    if not extracted_skills.document_title or extracted_skills.document_title == "Error":
+        extracted_skills.document_title = md_file.stem
+
+    logger.success(f"Extracted {len(extracted_skills.technologies)} technologies and {len(extracted_skills.soft_skills)} soft skills from {md_file.name}")
+    return extracted_skills
+
+
+def load_skill_encoder() -> Callable[[List[str]], np.ndarray]:
+    """Return a function embedding skill names with compare.py's multilingual encoder and embedding cache."""
+    # Imported lazily: the sentence-transformers stack is only needed for --merge-similar
+    from compare import SkillEncoder, normalize_rows, normalize_skill
+
+    encoder = SkillEncoder()
+    return lambda names: normalize_rows(encoder.encode([normalize_skill(name) for name in names]))
+
+
+def save_aliases(aliases: Dict[str, Dict[str, List[str]]], output_file: Path) -> None:
+    """Save the names merged into each canonical skill to a JSON file."""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(aliases, f, ensure_ascii=False, indent=2)
+    logger.success(f"Skill aliases saved to {output_file}")
+
+
+def process_markdown_files(output_dir: Path, concurrency: int = DEFAULT_CONCURRENCY,
+                           requests_per_minute: Optional[float] = None, base_url: Optional[str] = None,
+                           cache: Optional[ResponseCache] = None, merge_threshold: Optional[float] = None,
+                           aliases_file: Path = DEFAULT_ALIASES_PATH, max_request_tokens: int = MAX_REQUEST_TOKENS,
+                           overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+                           max_documents: int = MAX_DOCUMENTS_PER_REQUEST) -> ExtractedSkills:
     """
     Process all markdown files in the output directory and extract skills.
-    
+
+    The files are planned into requests of at most max_request_tokens (see
+    request_plan.plan_requests): large files are split into overlapping chunks
+    and small ones are packed together. Requests are sent to the API
+    concurrently by a bounded thread pool; the chunks of each file are merged
+    and the files added to the deduplicator in file-name order, so the output
+    does not depend on which request finishes first.
+
     Args:
         output_dir: Path to the directory containing markdown files
-        
+        concurrency: Maximum number of requests in flight at once
+        requests_per_minute: Optional cap on the request rate across all threads
+        base_url: Optional OpenAI-compatible endpoint (e.g. a local test server)
+        cache: Optional response cache; unchanged documents are not sent to the API again
+        merge_threshold: If given, also merge skills whose names are at least this similar
+            (see SkillDeduplicator.merge_similar) and save the merged names to aliases_file
+        aliases_file: Where to save the aliases of merged skills
+        max_request_tokens: Maximum document tokens per request
+        overlap_tokens: Tokens repeated between consecutive chunks of a split file
+        max_documents: Maximum files and chunks packed into one request (1: no packing)
+
     Returns:
         ExtractedSkills: Deduplicated skills from all documents
     """
-    
+
     # Initialize the skill extractor
-    extractor = SkillExtractor()
+    rate_limiter = TokenBucket.per_minute(requests_per_minute) if requests_per_minute else None
+    extractor = SkillExtractor(base_url=base_url, rate_limiter=rate_limiter, cache=cache,
+                               max_request_tokens=max_request_tokens, overlap_tokens=overlap_tokens)
     deduplicator = SkillDeduplicator()
-    
+
     # Get all markdown files
-    md_files = list(output_dir.glob("*.md"))
-    
+    md_files = sorted(output_dir.glob("*.md"))
+
     if not md_files:
         logger.warning(f"No markdown files found in {output_dir}")
         return ExtractedSkills(technologies=[], soft_skills=[], document_title="No documents found")
-    
-    logger.info(f"Found {len(md_files)} markdown files to process")
-    
-    # Process each markdown file
-    for md_file in md_files:
-        logger.info(f"Processing {md_file.name}")
-        
-        try:
-            # Read the markdown content
-            content = md_file.read_text(encoding="utf-8")
-            
-            # Extract skills using the SkillExtractor
-            extracted_skills = extractor.extract_skills_from_text(content)
-            
-            # Set document title from filename if not extracted
-            if not extracted_skills.document_title or extracted_skills.document_title == "Error":
-                extracted_skills.document_title = md_file.stem
-            
-            # Add to deduplicator
-            deduplicator.add_extracted_skills(extracted_skills)
-            
-            logger.success(f"Extracted {len(extracted_skills.technologies)} technologies and {len(extracted_skills.soft_skills)} soft skills from {md_file.name}")
-            
-        except Exception as e:
-            logger.error(f"Failed to process {md_file.name}: {e}")
-            continue
-    
+
+    with profiling.span("extract.plan", files=len(md_files)):
+        requests = plan_requests([md_file.read_text(encoding="utf-8") for md_file in md_files],
+                                 max_request_tokens, overlap_tokens, max_documents)
+    chunk_counts = Counter(part.document for parts in requests for part in parts)
+    profiling.count("extract.planned_requests", len(requests))
+    logger.info(f"Found {len(md_files)} markdown files to process in {len(requests)} requests (concurrency: {concurrency})")
+
+    def label(part: Part) -> str:
+        name = md_files[part.document].name
+        return name if chunk_counts[part.document] == 1 else f"{name} (chunk {part.chunk + 1}/{chunk_counts[part.document]})"
+
+    # Extract concurrently; map() yields results in input order
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        responses = list(executor.map(lambda parts: extract_request(extractor, parts, [label(part) for part in parts]),
+                                      requests))
+
+    # Chunks of each file, in order; a failed request loses only its own parts
+    chunks = [[] for _ in md_files]
+    for parts, response in zip(requests, responses):
+        if response is not None:
+            for part, extracted_skills in zip(parts, response):
+                if extracted_skills is not None:
+                    chunks[part.document].append(extracted_skills)
+    all_skills = [combine_document(md_file, document_chunks, chunk_counts[i] - len(document_chunks))
+                  for i, (md_file, document_chunks) in enumerate(zip(md_files, chunks))]
+
+    # Add to deduplicator in a deterministic order
+    with profiling.span("dedup"):
+        for extracted_skills in all_skills:
+            if extracted_skills is not None:
+                deduplicator.add_extracted_skills(extracted_skills)
+
+    if merge_threshold is not None:
+        before = len(deduplicator.unique_technologies) + len(deduplicator.unique_soft_skills)
+        with profiling.span("dedup.merge_similar"):
+            deduplicator.merge_similar(load_skill_encoder(), merge_threshold)
+        after = len(deduplicator.unique_technologies) + len(deduplicator.unique_soft_skills)
+        logger.info(f"Merged {before - after} near-duplicate skills (similarity >= {merge_threshold})")
+        save_aliases(deduplicator.get_aliases(), aliases_file)
+
     # Get deduplicated results
     final_skills = deduplicator.get_deduplicated_skills()
-    
+
     logger.info(f"Final results after deduplication:")
     logger.info(f"  - {len(final_skills.technologies)} unique technologies")
     logger.info(f"  - {len(final_skills.soft_skills)} unique soft skills")
-    
+
     return final_skills
 
 
@@ -120,10 +273,36 @@ def save_to_json(skills: ExtractedSkills, output_file: Path) -> None:
     logger.success(f"Skills saved to {output_file}")
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract skills from markdown syllabi into a JSON file.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Maximum concurrent API requests (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--rpm", type=float, default=None, help="Maximum requests per minute across all threads")
+    parser.add_argument("--base-url", default=None, help="OpenAI-compatible API endpoint (default: OPENAI_BASE_URL or OpenAI)")
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE_PATH,
+                        help=f"SQLite file caching API responses (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API, ignoring the response cache")
+    parser.add_argument("--cache-max-entries", type=int, default=None, help="Evict least recently used responses beyond this many")
+    parser.add_argument("--cache-max-age-days", type=float, default=None, help="Discard cached responses older than this")
+    parser.add_argument("--merge-similar", action="store_true",
+                        help=f"Merge near-duplicate skill names by embedding similarity; aliases go to {DEFAULT_ALIASES_PATH}")
+    parser.add_argument("--merge-threshold", type=float, default=MERGE_THRESHOLD,
+                        help=f"Minimum cosine similarity for --merge-similar (default: {MERGE_THRESHOLD})")
+    parser.add_argument("--max-request-tokens", type=int, default=MAX_REQUEST_TOKENS,
+                        help=f"Document tokens per request; longer files are split into chunks (default: {MAX_REQUEST_TOKENS})")
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP_TOKENS,
+                        help=f"Tokens repeated between consecutive chunks of a split file (default: {CHUNK_OVERLAP_TOKENS})")
+    parser.add_argument("--pack", type=int, default=MAX_DOCUMENTS_PER_REQUEST,
+                        help=f"Maximum small files or chunks packed into one request; 1 disables packing (default: {MAX_DOCUMENTS_PER_REQUEST})")
+    profiling.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """
     Main function to process markdown files and extract skills to JSON.
     """
+    args = parse_args(argv)
     
     # Define paths
     output_dir = Path("output")
@@ -134,10 +313,34 @@ def main():
         logger.error(f"Output directory '{output_dir}' not found. Please run the main.py script first to generate markdown files.")
         return
     
+    cache = None
+    if not args.no_cache:
+        cache_limits = {}
+        if args.cache_max_entries is not None:
+            cache_limits["max_entries"] = args.cache_max_entries
+        if args.cache_max_age_days is not None:
+            cache_limits["max_age_days"] = args.cache_max_age_days
+        cache = ResponseCache(args.cache, **cache_limits)
+
+    try:
+        with profiling.session(args.profile, args.profile_trace):
+            run(args, output_dir, json_output_file, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def run(args, output_dir: Path, json_output_file: Path, cache: Optional[ResponseCache]) -> None:
+    """Extract, deduplicate and save the skills, then print a summary."""
     try:
         # Process all markdown files and extract skills
         logger.info("Starting skill extraction from markdown files...")
-        final_skills = process_markdown_files(output_dir)
+        final_skills = process_markdown_files(output_dir, concurrency=args.concurrency,
+                                              requests_per_minute=args.rpm, base_url=args.base_url,
+                                              cache=cache,
+                                              merge_threshold=args.merge_threshold if args.merge_similar else None,
+                                              max_request_tokens=args.max_request_tokens,
+                                              overlap_tokens=args.chunk_overlap, max_documents=args.pack)
         
         # Save results to JSON
         save_to_json(final_skills, json_output_file)
@@ -150,6 +353,10 @@ def main():
         print(f"Unique technologies found: {len(final_skills.technologies)}")
         print(f"Unique soft skills found: {len(final_skills.soft_skills)}")
         print(f"Results saved to: {json_output_file}")
+        if cache is not None:
+            stats = cache.stats()
+            print(f"Response cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({stats['hit_rate']:.0%} hit rate), {stats['entries']} entries")
         print("="*50)
         
         # Print some examples
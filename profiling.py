@@ -0,0 +1,253 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SAMPLE_INTERVAL = 0.1  # Seconds between RSS samples
+MAX_TRACE_EVENTS = 1_000_000  # Trace events kept per process; later ones are dropped
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes, or 0 if unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def peak_rss() -> int:
+    """
+    Peak resident set size of this process in bytes, or 0 if unknown.
+
+    Read from VmHWM on Linux, which starts afresh at exec. ru_maxrss, the
+    fallback elsewhere, is carried over from the parent across fork+exec, so
+    a child would report at least its parent's peak.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024  # kB
+    except (OSError, ValueError):
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, KiB elsewhere
+
+
+class Profiler:
+    """
+    Stage-level instrumentation for one process.
+
+    Disabled by default, in which case span() and count() cost one attribute
+    check. When enabled, it records:
+
+    - timers: call count and total/min/max duration per span name
+    - counters: named totals (tokens, retries, cache hits, ...)
+    - peak RSS of the process, and of its workers once their snapshots are merged
+    - with tracing, every span plus periodic RSS samples as Chrome trace events
+
+    Worker processes enable their own profiler via worker_config()/init_worker()
+    and hand their measurements back with snapshot(); the parent merge()s them.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.tracing = False
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._stop = threading.Event()
+        self.reset()
+
+    def reset(self):
+        self.timers = {}  # name -> [count, total seconds, min, max]
+        self.counters = {}
+        self.events = []
+        self.dropped_events = 0
+        self.worker_peak_rss = 0
+        self.started = time.time()
+
+    def enable(self, tracing: bool = False, sample_interval: float = SAMPLE_INTERVAL) -> None:
+        self.enabled = True
+        self.tracing = tracing
+        if tracing and self._sampler is None and sample_interval:
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample, args=(sample_interval,), daemon=True)
+            self._sampler.start()
+
+    def disable(self) -> None:
+        self.enabled = False
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def _sample(self, interval):
+        while not self._stop.wait(interval):
+            if self.tracing:
+                self._add_event({"name": "rss", "ph": "C", "ts": time.time() * 1e6, "pid": os.getpid(),
+                                 "args": {"rss_mb": round(current_rss() / 2**20, 1)}})
+
+    def _add_event(self, event):
+        with self._lock:
+            if len(self.events) < MAX_TRACE_EVENTS:
+                self.events.append(event)
+            else:
+                self.dropped_events += 1
+
+    def record(self, name: str, seconds: float, start: float = None, args: dict = None) -> None:
+        """Add one measured duration to a timer (and the trace, if tracing)."""
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                self.timers[name] = [1, seconds, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                timer[2] = min(timer[2], seconds)
+                timer[3] = max(timer[3], seconds)
+        if self.tracing and start is not None:
+            event = {"name": name, "ph": "X", "ts": start * 1e6, "dur": seconds * 1e6,
+                     "pid": os.getpid(), "tid": threading.get_ident()}
+            if args:
+                event["args"] = args
+            self._add_event(event)
+
+    @contextmanager
+    def span(self, name: str, **args):
+        """Time the enclosed block under name; keyword arguments are attached to its trace event."""
+        if not self.enabled:
+            yield
+            return
+        wall = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, wall, args)
+
+    def count(self, name: str, value=1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self) -> dict:
+        """Return and clear this process's measurements, for merging into another process."""
+        with self._lock:
+            data = {
+                "timers": self.timers, "counters": self.counters, "events": self.events,
+                "dropped_events": self.dropped_events, "peak_rss": peak_rss(),
+            }
+            self.timers, self.counters, self.events, self.dropped_events = {}, {}, [], 0
+        return data
+
+    def merge(self, data: dict) -> None:
+        """Add measurements returned by snapshot() in another process."""
+        if not data:
+            return
+        with self._lock:
+            for name, (n, total, low, high) in data["timers"].items():
+                timer = self.timers.get(name)
+                if timer is None:
+                    self.timers[name] = [n, total, low, high]
+                else:
+                    timer[0] += n
+                    timer[1] += total
+                    timer[2] = min(timer[2], low)
+                    timer[3] = max(timer[3], high)
+            for name, value in data["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            room = MAX_TRACE_EVENTS - len(self.events)
+            self.events.extend(data["events"][:room])
+            self.dropped_events += data["dropped_events"] + max(0, len(data["events"]) - room)
+            self.worker_peak_rss = max(self.worker_peak_rss, data["peak_rss"])
+
+    def report(self) -> dict:
+        """Timers (sorted by total time), counters and memory as a JSON-serializable dict."""
+        with self._lock:
+            timers = {
+                name: {
+                    "count": n,
+                    "total_s": round(total, 6),
+                    "mean_ms": round(total / n * 1e3, 3),
+                    "min_ms": round(low * 1e3, 3),
+                    "max_ms": round(high * 1e3, 3),
+                }
+                for name, (n, total, low, high) in sorted(self.timers.items(), key=lambda item: -item[1][1])
+            }
+            return {
+                "command": sys.argv,
+                "wall_s": round(time.time() - self.started, 6),
+                "peak_rss_mb": round(peak_rss() / 2**20, 1),
+                "worker_peak_rss_mb": round(self.worker_peak_rss / 2**20, 1),
+                "timers": timers,
+                "counters": dict(sorted(self.counters.items())),
+                "dropped_trace_events": self.dropped_events,
+            }
+
+    def write_trace(self, path) -> None:
+        """Write the recorded spans and RSS samples in Chrome trace-event format."""
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event["ts"])
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+# Process-wide profiler used by the instrumented modules
+profiler = Profiler()
+span = profiler.span
+count = profiler.count
+snapshot = profiler.snapshot
+merge = profiler.merge
+
+
+def worker_config():
+    """Arguments for init_worker(), so worker processes profile like the parent."""
+    return profiler.enabled, profiler.tracing
+
+
+def init_worker(enabled, tracing):
+    """Process-pool initializer enabling the worker's profiler."""
+    profiler.reset()
+    if enabled:
+        profiler.enable(tracing)
+
+
+def add_arguments(parser) -> None:
+    """Add the --profile and --profile-trace options to a script's argument parser."""
+    parser.add_argument("--profile", metavar="PATH", default=None,
+                        help="Write a JSON report of stage timings, counters and peak memory to PATH")
+    parser.add_argument("--profile-trace", metavar="PATH", default=None,
+                        help="With --profile, also write a Chrome trace (chrome://tracing, Perfetto) to PATH")
+
+
+@contextmanager
+def session(report_path=None, trace_path=None):
+    """
+    Profile the enclosed block if report_path is given, then write the report (and trace).
+
+    The report is written even if the block raises.
+    """
+    if report_path is None:
+        yield
+        return
+    profiler.reset()
+    profiler.enable(tracing=trace_path is not None)
+    try:
+        yield
+    finally:
+        profiler.disable()
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(profiler.report(), f, indent=2)
+        if trace_path is not None:
+            profiler.write_trace(trace_path)
@@ -0,0 +1,123 @@
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+STUDY_BLOCK = 4096  # Study-skill columns upcast at a time when scoring compact embeddings
+INT8_MAX = 127
+
+
+class QuantizedEmbeddings:
+    """
+    L2-normalized embeddings in a compact storage format.
+
+    - float32: stored as-is
+    - float16: half the memory, values rounded to half precision
+    - int8:    a quarter of the memory; each vector is stored as round(x / scale)
+               with its own symmetric scale = max|x| / 127
+
+    Similarities are computed on the stored values and rescaled afterwards. For
+    int8, the products of two int8 vectors are integers well below 2**24, so
+    summing them in float32 BLAS is exact: only the quantization itself
+    introduces error.
+    """
+
+    def __init__(self, values: np.ndarray, scales: np.ndarray = None):
+        self.values = values
+        self.scales = scales
+
+    @classmethod
+    def from_float(cls, embeddings: np.ndarray, precision: str) -> "QuantizedEmbeddings":
+        """Normalize float embeddings and store them with the given precision."""
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision} (expected one of {', '.join(PRECISIONS)})")
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        embeddings = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        if precision == "float32":
+            return cls(embeddings)
+        if precision == "float16":
+            return cls(embeddings.astype(np.float16))
+        scales = np.maximum(np.abs(embeddings).max(axis=1, initial=0.0), 1e-12) / INT8_MAX
+        values = np.rint(embeddings / scales[:, None]).astype(np.int8)
+        return cls(values, scales.astype(np.float32))
+
+    @property
+    def precision(self) -> str:
+        return self.values.dtype.name
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def take(self, rows) -> "QuantizedEmbeddings":
+        """Subset of the vectors, in the given row order."""
+        return QuantizedEmbeddings(self.values[rows], self.scales[rows] if self.scales is not None else None)
+
+    def to_float(self) -> np.ndarray:
+        """Dequantized float32 copy."""
+        values = self.values.astype(np.float32)
+        return values * self.scales[:, None] if self.scales is not None else values
+
+    def similarity(self, other: "QuantizedEmbeddings") -> np.ndarray:
+        """
+        Cosine similarities between these vectors and other's, as a float32 matrix.
+
+        other is upcast STUDY_BLOCK rows at a time, so its compact form is never
+        fully expanded.
+        """
+        left = self.values.astype(np.float32)
+        out = np.empty((len(self), len(other)), dtype=np.float32)
+        for start in range(0, len(other), STUDY_BLOCK):
+            block = other.values[start:start + STUDY_BLOCK].astype(np.float32)
+            scores = left @ block.T
+            if other.scales is not None:
+                scores *= other.scales[start:start + STUDY_BLOCK]
+            out[:, start:start + STUDY_BLOCK] = scores
+        if self.scales is not None:
+            out *= self.scales[:, None]
+        return out
+
+
+def count_flips(embeddings: np.ndarray, study_embeddings: np.ndarray, precision: str, threshold: float,
+                weights: np.ndarray = None, batch: int = 4096) -> dict:
+    """
+    Count match decisions that change when similarities use a compact precision instead of float32.
+
+    Args:
+        embeddings: Float job-skill embeddings (one row per distinct job skill)
+        study_embeddings: Float study-skill embeddings
+        precision: 'float16' or 'int8'
+        threshold: Minimum cosine similarity for a match
+        weights: Optional occurrences of each job skill, to count flips per occurrence
+
+    Returns:
+        dict: flipped job-skill decisions (matched / not matched), flipped (job skill, study skill)
+        pair decisions, and the totals they are out of
+    """
+    exact_study = QuantizedEmbeddings.from_float(study_embeddings, "float32")
+    compact_study = QuantizedEmbeddings.from_float(study_embeddings, precision)
+    weights = np.ones(len(embeddings), dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.int64)
+
+    skill_flips = gained = lost = pair_flips = 0
+    for start in range(0, len(embeddings), batch):
+        chunk = embeddings[start:start + batch]
+        w = weights[start:start + batch]
+        exact_hits = QuantizedEmbeddings.from_float(chunk, "float32").similarity(exact_study) >= threshold
+        compact_hits = QuantizedEmbeddings.from_float(chunk, precision).similarity(compact_study) >= threshold
+
+        exact_any, compact_any = exact_hits.any(axis=1), compact_hits.any(axis=1)
+        skill_flips += int(w[exact_any != compact_any].sum())
+        gained += int(w[compact_any & ~exact_any].sum())
+        lost += int(w[exact_any & ~compact_any].sum())
+        pair_flips += int((w[:, None] * (exact_hits != compact_hits)).sum())
+
+    total = int(weights.sum())
+    return {
+        "job_skill_decisions": total,
+        "job_skill_flips": skill_flips,
+        "job_skills_gained": gained,
+        "job_skills_lost": lost,
+        "pair_decisions": total * len(study_embeddings),
+        "pair_flips": pair_flips,
+    }
@@ -0,0 +1,38 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how often a shared resource is used.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    acquire() takes one token, blocking until one is available.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute: float, burst: float = None) -> "TokenBucket":
+        """Create a bucket allowing requests_per_minute on average."""
+        return cls(requests_per_minute / 60.0, burst)
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Take tokens from the bucket, sleeping until enough have accumulated."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,124 @@
+from functools import lru_cache
+from typing import List, NamedTuple
+from loguru import logger
+
+MAX_REQUEST_TOKENS = 16000  # Document tokens sent in one request, packed documents included
+CHUNK_OVERLAP_TOKENS = 200  # Tokens repeated at the start of the next chunk of a split document
+MAX_DOCUMENTS_PER_REQUEST = 8  # Documents (or chunks) packed into one request
+CHARS_PER_TOKEN = 4  # Estimate used when tiktoken is not installed
+TOKEN_ENCODING = "o200k_base"  # Tokenizer of the gpt-4.1 models
+
+
+class Part(NamedTuple):
+    """One document, or one chunk of a document, inside a request."""
+
+    document: int  # Index of the document in the planned list
+    chunk: int  # Position of the chunk within the document
+    text: str
+    tokens: int
+
+
+@lru_cache(maxsize=1)
+def _tokenizer():
+    """tiktoken encoding, or None if tiktoken is not installed or its encoding cannot be loaded (e.g. offline)."""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken is not installed (uv sync --extra tokens); estimating token counts")
+        return None
+    try:
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception as e:
+        logger.warning(f"Could not load the {TOKEN_ENCODING} tokenizer ({e.__class__.__name__}); estimating token counts")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text: exact with tiktoken, otherwise estimated from its length."""
+    tokenizer = _tokenizer()
+    if tokenizer is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(tokenizer.encode(text, disallowed_special=()))
+
+
+def split_long_line(line: str, tokens: int, max_tokens: int) -> List[str]:
+    """Cut a single line longer than max_tokens into pieces of roughly max_tokens, at spaces where possible."""
+    size = max(1, len(line) * max_tokens // tokens)
+    pieces = []
+    while len(line) > size:
+        cut = line.rfind(" ", size // 2, size)
+        cut = cut + 1 if cut > 0 else size
+        pieces.append(line[:cut])
+        line = line[cut:]
+    pieces.append(line)
+    return pieces
+
+
+def split_text(text: str, max_tokens: int = MAX_REQUEST_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> List[str]:
+    """
+    Split text into chunks of at most max_tokens, on line boundaries.
+
+    Each chunk after the first starts with the last lines of the previous one,
+    up to overlap_tokens, so a skill described across a chunk boundary is seen
+    whole at least once. A text that fits is returned as a single chunk.
+    """
+    if count_tokens(text) <= max_tokens:
+        return [text]
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+
+    lines = []
+    for line in text.splitlines(keepends=True):
+        tokens = count_tokens(line)
+        if tokens > max_tokens:
+            lines += [(piece, count_tokens(piece)) for piece in split_long_line(line, tokens, max_tokens)]
+        else:
+            lines.append((line, tokens))
+
+    chunks = []
+    current, current_tokens = [], 0
+    for line, tokens in lines:
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("".join(line_text for line_text, _ in current))
+            # Carry the tail of the chunk over, within the overlap budget
+            carried, carried_tokens = [], 0
+            for previous in reversed(current):
+                if carried_tokens + previous[1] > overlap_tokens or carried_tokens + previous[1] + tokens > max_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous[1]
+            current, current_tokens = carried, carried_tokens
+        current.append((line, tokens))
+        current_tokens += tokens
+    if current:
+        chunks.append("".join(line_text for line_text, _ in current))
+    return chunks
+
+
+def plan_requests(texts: List[str], max_tokens: int = MAX_REQUEST_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+                  max_documents: int = MAX_DOCUMENTS_PER_REQUEST) -> List[List[Part]]:
+    """
+    Group documents into requests of at most max_tokens document tokens.
+
+    Documents larger than max_tokens are split into overlapping chunks (see
+    split_text). Documents and chunks are then packed, in order, into requests
+    of up to max_documents parts, so small documents share one request and its
+    system prompt. An empty document gets no part.
+
+    Returns:
+        list: Per request, its parts
+    """
+    requests = []
+    current, current_tokens = [], 0
+    for document, text in enumerate(texts):
+        if not text.strip():
+            continue
+        for chunk, chunk_text in enumerate(split_text(text, max_tokens, overlap_tokens)):
+            tokens = count_tokens(chunk_text)
+            if current and (current_tokens + tokens > max_tokens or len(current) >= max_documents):
+                requests.append(current)
+                current, current_tokens = [], 0
+            current.append(Part(document, chunk, chunk_text, tokens))
+            current_tokens += tokens
+    if current:
+        requests.append(current)
+    return requests
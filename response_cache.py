@@ -0,0 +1,114 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_AGE_DAYS = 90
+
+
+class ResponseCache:
+    """
+    Persistent SQLite cache of LLM responses, keyed by a hash of the request.
+
+    Entries older than max_age_days are dropped, and once there are more than
+    max_entries the least recently used ones are evicted. The cache is safe to
+    share between threads.
+    """
+
+    def __init__(self, path, max_entries: int = DEFAULT_MAX_ENTRIES, max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Stable SHA-256 of the request parts (model, prompts, sampling parameters, ...)."""
+        return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND created >= ?",
+                (key, now - self.max_age_seconds),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        """Store a value, replacing any previous entry for key."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._conn.commit()
+
+    def invalidate(self, key: str) -> None:
+        """Drop an entry returned by get that turned out to be unusable; its lookup counts as a miss."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+            self.hits -= 1
+            self.misses += 1
+
+    def evict(self) -> int:
+        """Drop expired entries and trim the cache to max_entries. Returns the number removed."""
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self.max_age_seconds,)
+            ).rowcount
+            removed += self._conn.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            ).rowcount
+            self._conn.commit()
+        self.evictions += removed
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this session."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self),
+        }
+
+    def close(self) -> None:
+        self.evict()
+        with self._lock:
+            self._conn.close()
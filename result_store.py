@@ -0,0 +1,184 @@
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+
+
+class ResultStore:
+    """
+    Persistent per-job comparison results, for incremental re-runs of compare.py.
+
+    Each posting is stored under its key (its URL, or its content hash if it
+    has none) with a hash of its content, its result row and the study skills
+    it matched at every threshold. The aggregate counters (job-skill
+    occurrences and per-study-skill job counts) are kept alongside and updated
+    as postings are added, changed or removed, so a run only has to match the
+    postings that changed since the previous one.
+
+    The store is bound to the study skills and matching options it was built
+    with; if those change, it is cleared and every posting is matched again.
+    All updates of a run are committed together by commit().
+    """
+
+    def __init__(self, path, config: dict, n_thresholds: int, n_study_skills: int):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " key TEXT PRIMARY KEY,"
+            " content_hash TEXT NOT NULL,"
+            " position INTEGER NOT NULL,"
+            " result TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS job_skill_counts (skill TEXT PRIMARY KEY, count INTEGER NOT NULL);"
+        )
+
+        fingerprint = self.make_key(config)
+        self.reset = self._get_meta("config") != fingerprint
+        if self.reset:
+            self._conn.execute("DELETE FROM jobs")
+            self._conn.execute("DELETE FROM job_skill_counts")
+            self._set_meta("config", fingerprint)
+            self.study_skill_match_counts = np.zeros((n_thresholds, n_study_skills), dtype=np.int64)
+        else:
+            self.study_skill_match_counts = np.array(json.loads(self._get_meta("study_skill_match_counts")),
+                                                     dtype=np.int64).reshape(n_thresholds, n_study_skills)
+
+        self._hashes = dict(self._conn.execute("SELECT key, content_hash FROM jobs"))
+        self._seen = set()
+        self.added = self.changed = self.removed = 0
+
+    @staticmethod
+    def make_key(value) -> str:
+        """Stable SHA-256 of a JSON-serializable value."""
+        return hashlib.sha256(json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _get_meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def job_key(self, job: dict, content_hash: str) -> str:
+        """Key of a posting in this run: its URL, made unique if several postings share it."""
+        key = job.get("url") or content_hash
+        base, n = key, 1
+        while key in self._seen:
+            n += 1
+            key = f"{base}#{n}"
+        self._seen.add(key)
+        return key
+
+    def is_current(self, key: str, content_hash: str) -> bool:
+        return self._hashes.get(key) == content_hash
+
+    def touch(self, key: str, position: int) -> None:
+        """Record the position of an unchanged posting in this run's input."""
+        self._conn.execute("UPDATE jobs SET position = ? WHERE key = ?", (position, key))
+
+    def put(self, key: str, content_hash: str, position: int, result: dict) -> None:
+        """
+        Store the result of a new or changed posting, replacing the contribution of its previous version.
+
+        Args:
+            key: Posting key (see job_key)
+            content_hash: Hash of the posting's content
+            position: Index of the posting in this run's input
+            result: job_title, company, total_job_skills, plus per threshold the matched job-skill
+                count ('matched') and matched study-skill indices ('study_ids'), and the posting's
+                raw job skills ('job_skills')
+        """
+        if key in self._hashes:
+            self._subtract(key)
+            self.changed += 1
+        else:
+            self.added += 1
+        self._conn.execute(
+            "INSERT OR REPLACE INTO jobs (key, content_hash, position, result) VALUES (?, ?, ?, ?)",
+            (key, content_hash, position, json.dumps(result, ensure_ascii=False)),
+        )
+        self._hashes[key] = content_hash
+
+        self._conn.executemany(
+            "INSERT INTO job_skill_counts (skill, count) VALUES (?, ?) "
+            "ON CONFLICT(skill) DO UPDATE SET count = count + excluded.count",
+            _count(result["job_skills"]).items(),
+        )
+        for counts, study_ids in zip(self.study_skill_match_counts, result["study_ids"]):
+            counts[study_ids] += 1
+
+    def _subtract(self, key: str) -> None:
+        """Remove a stored posting's contribution from the aggregate counters."""
+        result = json.loads(self._conn.execute("SELECT result FROM jobs WHERE key = ?", (key,)).fetchone()[0])
+        self._conn.executemany(
+            "UPDATE job_skill_counts SET count = count - ? WHERE skill = ?",
+            [(count, skill) for skill, count in _count(result["job_skills"]).items()],
+        )
+        for counts, study_ids in zip(self.study_skill_match_counts, result["study_ids"]):
+            counts[study_ids] -= 1
+
+    def remove_unseen(self) -> int:
+        """Drop the postings that were not part of this run's input. Returns how many were removed."""
+        for key in [key for key in self._hashes if key not in self._seen]:
+            self._subtract(key)
+            self._conn.execute("DELETE FROM jobs WHERE key = ?", (key,))
+            del self._hashes[key]
+            self.removed += 1
+        self._conn.execute("DELETE FROM job_skill_counts WHERE count <= 0")
+        return self.removed
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def iter_results(self, threshold_index: int, batch: int = 10000):
+        """
+        Yield lists of result rows (see compare.RESULT_COLUMNS) for one threshold, in input order.
+        """
+        cursor = self._conn.execute("SELECT result FROM jobs ORDER BY position")
+        while rows := cursor.fetchmany(batch):
+            results = []
+            for (value,) in rows:
+                result = json.loads(value)
+                matched = result["matched"][threshold_index]
+                total = result["total_job_skills"]
+                results.append({
+                    "job_title": result["job_title"],
+                    "company": result["company"],
+                    "matched_job_skills": matched,
+                    "total_job_skills": total,
+                    "match_ratio": matched / total if total > 0 else 0,
+                })
+            yield results
+
+    def job_skill_counter(self) -> dict:
+        """
+        Occurrences of every job skill across the stored postings.
+
+        Skills are ordered by first appearance in the current input, as in the
+        counter of a full run, so ties in the frequency CSV come out the same.
+        """
+        counts = dict(self._conn.execute("SELECT skill, count FROM job_skill_counts"))
+        counter = {}
+        for (value,) in self._conn.execute("SELECT result FROM jobs ORDER BY position"):
+            for skill in json.loads(value)["job_skills"]:
+                if skill not in counter:
+                    counter[skill] = counts[skill]
+        return counter
+
+    def commit(self) -> None:
+        self._set_meta("study_skill_match_counts", json.dumps(self.study_skill_match_counts.tolist()))
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _count(items) -> dict:
+    """Occurrences of each item, in order of first appearance."""
+    counts = {}
+    for item in items:
+        counts[item] = counts.get(item, 0) + 1
+    return counts
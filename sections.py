@@ -0,0 +1,100 @@
+import re
+from typing import Iterator, NamedTuple, Optional
+
+
+class SectionMarkers(NamedTuple):
+    """Compiled markers delimiting the learning-outcome rows of one syllabus language."""
+
+    start: re.Pattern  # Section heading, including the whitespace after it
+    end: re.Pattern  # Heading of the section that follows
+    code: re.Pattern  # Outcome code opening a row, including the whitespace after it
+    row: re.Pattern  # Anchored code + content, used when the greedy code swallows the K2_IZ marker
+
+
+POLISH_HEADING = "Przedmiotowe efekty uczenia się"
+ENGLISH_HEADING = "Subject's learning outcomes"
+
+MARKERS = {
+    "pl": SectionMarkers(
+        start=re.compile(re.escape(POLISH_HEADING) + r"\s*"),
+        end=re.compile(r"\nTreści programowe zapewniające uzyskanie efektów uczenia się"),
+        code=re.compile(r"PEU[ _]?[WUK]\d+\s*"),
+        row=re.compile(r"PEU[ _]?[WUK]\d+\s*(.*?)(?=\s*K2[ _]?IZ)", re.DOTALL),
+    ),
+    "en": SectionMarkers(
+        start=re.compile(re.escape(ENGLISH_HEADING) + r"\s*"),
+        end=re.compile(r"\nProgram content ensuring learning outcomes"),
+        code=re.compile(r"PEU_\w+\d+\s*"),
+        row=re.compile(r"PEU_\w+\d+\s*(.*?)(?=\s*K2[ _]?IZ)", re.DOTALL),
+    ),
+}
+
+# Programme-outcome code starting the column after an outcome's content
+OUTCOME_END = re.compile(r"K2[ _]?IZ")
+HEADINGS = re.compile(f"({re.escape(POLISH_HEADING)})|({re.escape(ENGLISH_HEADING)})")
+
+
+def detect_language(text: str) -> Optional[str]:
+    """
+    Return 'pl' or 'en' depending on which learning-outcomes heading the document uses.
+
+    Polish wins when both headings are present, matching the order in which
+    the extractors were historically tried.
+    """
+    match = HEADINGS.search(text)
+    if match is None:
+        return None
+    if match.group(1) or text.find(POLISH_HEADING, match.end()) != -1:
+        return "pl"
+    return "en"
+
+
+def iter_outcomes(text: str, language: str) -> Iterator[str]:
+    """
+    Yield the cleaned content of every learning-outcome row, in document order.
+
+    Walks the section and row markers strictly forward, so the whole document
+    is scanned once. Within each learning-outcomes section (up to the next
+    programme-content heading, or the end of the text), a row runs from an
+    outcome code (e.g. PEU_W01) to the next K2_IZ programme-outcome code.
+
+    Args:
+        text: Full text of the converted syllabus
+        language: 'pl' or 'en'
+
+    Yields:
+        str: Row content with surrounding quotes/commas stripped and whitespace normalized
+    """
+    markers = MARKERS[language]
+    pos = 0
+    while (start := markers.start.search(text, pos)) is not None:
+        section_start = start.end()
+        end = markers.end.search(text, section_start)
+        section_end = end.start() if end is not None else len(text)
+
+        row_pos = section_start
+        while (code := markers.code.search(text, row_pos, section_end)) is not None:
+            outcome_end = OUTCOME_END.search(text, code.end(), section_end)
+            if outcome_end is not None:
+                content_start, content_end = code.end(), outcome_end.start()
+            else:
+                # The greedy code may have consumed a K2_IZ marker (e.g. "PEU_W1aK2_IZ"), in which
+                # case the original pattern backtracks to a shorter code. If even that fails, no
+                # later row in this section can reach a K2_IZ marker either.
+                row = markers.row.match(text, code.start(), section_end)
+                if row is None:
+                    break
+                content_start, content_end = row.span(1)
+
+            # Clean up the captured content by removing potential junk characters
+            # like quotes and commas from the start and end, and normalizing whitespace.
+            content = text[content_start:content_end].strip().strip('",')
+            content = " ".join(content.split())
+            if content:
+                yield content
+            row_pos = content_end
+
+        if end is None:
+            break
+        pos = section_end
+
@@ -0,0 +1,310 @@
+"""
+Long-lived local matching service around compare.py.
+
+The model and the study-skill embeddings are loaded once at start-up.
+Postings are then matched over HTTP, on a TCP port or a Unix socket:
+
+    POST /match   one posting (JSON object) or a batch (JSON array of postings)
+    GET  /health  model, study skills and batching statistics
+
+Each posting is answered with compare.py's result columns plus its matched
+(job skill, study skill, similarity) pairs. Concurrent requests are collected
+into micro-batches, so one encoder call and one similarity pass serve all of
+them; their distinct job skills are encoded once per batch.
+
+    python service.py --port 8765
+    curl -s localhost:8765/match -d '{"title": "Data Engineer", "requirements": "Python, SQL"}'
+"""
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from compare import (CACHE_DIR, MODEL_NAME, SIMILARITY_THRESHOLD, SKILLS_PATH, TOP_K, SkillEncoder, load_study_skills,
+                     normalize_skill, process_job_chunk)
+from matching import TILE_ROWS, DenseMatcher, IndexMatcher, normalize_rows
+from quantize import PRECISIONS
+from skill_index import build_index
+
+HOST = "127.0.0.1"
+PORT = 8765
+MAX_BATCH_JOBS = 256  # Postings matched together in one micro-batch
+MAX_WAIT_MS = 2.0  # How long a batch waits for more requests once the queue is empty
+MAX_BODY_BYTES = 64 << 20
+MAX_MEMORY_SKILLS = 50000  # Uncached job-skill embeddings kept in memory (least recently used first out)
+
+
+class MicroBatcher:
+    """
+    Runs a batch function on postings from many threads, one batch at a time.
+
+    A single worker thread takes every request queued while the previous batch
+    ran (up to max_jobs postings), waits at most max_wait seconds for more, and
+    matches them together. Under load batches grow on their own; an idle
+    service answers a lone request after at most max_wait.
+    """
+
+    def __init__(self, process, max_jobs=MAX_BATCH_JOBS, max_wait=MAX_WAIT_MS / 1000):
+        """
+        Args:
+            process: Callable mapping a list of postings to one result per posting
+            max_jobs: Maximum postings per batch; a larger single request still runs as one batch
+            max_wait: Seconds to wait for further requests before running a batch
+        """
+        self.process = process
+        self.max_jobs = max_jobs
+        self.max_wait = max_wait
+        self.batches = 0
+        self.jobs = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, jobs) -> list:
+        """Match postings and block until their results are ready."""
+        future = Future()
+        self._queue.put((jobs, future))
+        return future.result()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first):
+        """The first request plus whatever arrives before the batch is full or max_wait has passed."""
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_jobs:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            if item is None:
+                self._queue.put(None)  # Stop after this batch
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            jobs = [job for request_jobs, _ in batch for job in request_jobs]
+            try:
+                results = self.process(jobs)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.jobs += len(jobs)
+            self.requests += len(batch)
+            start = 0
+            for request_jobs, future in batch:
+                future.set_result(results[start:start + len(request_jobs)])
+                start += len(request_jobs)
+
+
+class MatchService:
+    """The encoder, study skills and matcher of one compare.py configuration, kept in memory."""
+
+    def __init__(self, skills_paths=(SKILLS_PATH,), model_name=MODEL_NAME, threshold=SIMILARITY_THRESHOLD,
+                 index="dense", top_k=TOP_K, n_probe=8, precision="float32", cache_dir=CACHE_DIR,
+                 max_memory_skills=MAX_MEMORY_SKILLS):
+        self.model_name = model_name
+        self.study_skills = load_study_skills(skills_paths)
+        # Read-only: vectors the cache lacks are kept in memory, up to max_memory_skills of them, rather than
+        # appended to a cache other runs write to
+        self.encoder = SkillEncoder(model_name, cache_dir, read_only=True, show_progress=False,
+                                    max_pending=max_memory_skills)
+
+        # Load the model now rather than on the first request that has an uncached skill
+        self.encoder.model.encode(["warm-up"], show_progress_bar=False)
+        self.study_embeddings = normalize_rows(self.encoder.encode([normalize_skill(s) for s in self.study_skills]))
+
+        if index == "dense":
+            self.matcher = DenseMatcher(self.study_embeddings, [threshold], TILE_ROWS, precision, with_edges=True)
+        else:
+            if precision != "float32":
+                raise ValueError("precision is only supported with the dense index")
+            index_options = {"n_probe": n_probe} if index == "ivf" else {}
+            self.matcher = IndexMatcher(build_index(index, self.study_embeddings, **index_options), threshold, top_k,
+                                        TILE_ROWS, with_edges=True)
+
+    def match(self, jobs) -> list:
+        """
+        Match postings in one encoder call and one similarity pass.
+
+        Returns:
+            list: Per posting, compare.py's result row plus "matches", its
+            (job_skill, study_skill, similarity) pairs by decreasing similarity
+        """
+        if not jobs:
+            return []
+        chunk = process_job_chunk(jobs, self.encoder, self.matcher)
+        results = chunk.results_per_threshold[0]
+        job_ids, rows, study_ids, scores = chunk.edges
+        bounds = np.searchsorted(job_ids, np.arange(len(jobs) + 1))
+        for j, result in enumerate(results):
+            lo, hi = bounds[j], bounds[j + 1]
+            order = lo + np.argsort(-scores[lo:hi], kind="stable")
+            result["matches"] = [
+                {"job_skill": chunk.vocabulary[row], "study_skill": self.study_skills[study_id], "similarity": round(score, 4)}
+                for row, study_id, score in zip(rows[order].tolist(), study_ids[order].tolist(), scores[order].tolist())
+            ]
+        return results
+
+
+def make_handler(service, batcher):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately; with Nagle on, keep-alive replies wait for a delayed ACK
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def address_string(self):
+            # Unix-socket clients have no (host, port) address
+            return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+        def send_json(self, status, payload):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path != "/health":
+                self.send_json(404, {"error": f"unknown path {self.path}"})
+                return
+            self.send_json(200, {
+                "model": service.model_name,
+                "study_skills": len(service.study_skills),
+                "requests": batcher.requests,
+                "jobs": batcher.jobs,
+                "batches": batcher.batches,
+                "mean_batch_jobs": batcher.jobs / batcher.batches if batcher.batches else 0.0,
+            })
+
+        def do_POST(self):
+            if self.path != "/match":
+                self.send_json(404, {"error": f"unknown path {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError:
+                # The body's extent is unknown, so the connection cannot be reused
+                self.close_connection = True
+                self.send_json(400, {"error": f"invalid Content-Length: {self.headers.get('Content-Length')}"})
+                return
+            if length > MAX_BODY_BYTES:
+                self.close_connection = True
+                self.send_json(413, {"error": f"request body larger than {MAX_BODY_BYTES} bytes"})
+                return
+            try:
+                body = json.loads(self.rfile.read(length))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                self.send_json(400, {"error": f"invalid JSON: {e}"})
+                return
+            jobs = body if isinstance(body, list) else [body]
+            if not all(isinstance(job, dict) for job in jobs):
+                self.send_json(400, {"error": "expected a posting object or an array of posting objects"})
+                return
+            try:
+                results = batcher.submit(jobs)
+            except Exception as e:
+                self.send_json(500, {"error": str(e)})
+                return
+            self.send_json(200, results if isinstance(body, list) else results[0])
+
+    return Handler
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, batcher, host=HOST, port=PORT, unix_socket=None):
+    """HTTP server answering /match and /health on a TCP port or, with unix_socket, on that socket path."""
+    handler = make_handler(service, batcher)
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        handler.disable_nagle_algorithm = False  # TCP_NODELAY does not apply to Unix sockets
+        return ThreadingUnixHTTPServer(unix_socket, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve compare.py matching over HTTP with a warm model.")
+    parser.add_argument("--host", default=HOST, help=f"Address to listen on (default: {HOST})")
+    parser.add_argument("--port", type=int, default=PORT, help=f"TCP port (default: {PORT})")
+    parser.add_argument("--unix-socket", metavar="PATH", default=None, help="Listen on a Unix socket instead of a TCP port")
+    parser.add_argument("--model", default=MODEL_NAME,
+                        help=f"Sentence-transformers model name or local model directory (default: {MODEL_NAME})")
+    parser.add_argument("--skills", nargs="+", default=[SKILLS_PATH],
+                        help=f"One or more extracted skills JSON files whose skills are combined (default: {SKILLS_PATH})")
+    parser.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD,
+                        help=f"Minimum cosine similarity for a match (default: {SIMILARITY_THRESHOLD})")
+    parser.add_argument("--index", choices=["dense", "exact", "ivf"], default="dense",
+                        help="dense: compare with every study skill (default); exact/ivf: top-k search in a study-skill index")
+    parser.add_argument("--top-k", type=int, default=TOP_K, help=f"Study skills considered per job skill with --index (default: {TOP_K})")
+    parser.add_argument("--n-probe", type=int, default=8, help="Clusters searched per query with --index ivf (default: 8)")
+    parser.add_argument("--precision", choices=PRECISIONS, default="float32",
+                        help="Storage and similarity precision of normalized embeddings with --index dense (default: float32)")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH_JOBS,
+                        help=f"Maximum postings matched in one micro-batch (default: {MAX_BATCH_JOBS})")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                        help=f"Milliseconds a micro-batch waits for more requests (default: {MAX_WAIT_MS:g})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.precision != "float32" and args.index != "dense":
+        raise SystemExit("--precision is only supported with --index dense")
+
+    print(f"Loading {args.model} and encoding study skills from {', '.join(args.skills)}...")
+    service = MatchService(args.skills, args.model, args.threshold, args.index, args.top_k, args.n_probe, args.precision)
+    batcher = MicroBatcher(service.match, args.max_batch, args.max_wait_ms / 1000)
+    server = make_server(service, batcher, args.host, args.port, args.unix_socket)
+    address = args.unix_socket or "http://{}:{}".format(*server.server_address[:2])
+    print(f"Serving {len(service.study_skills)} study skills on {address} (POST /match, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.unlink(args.unix_socket)
+
+
+if __name__ == "__main__":
+    main()
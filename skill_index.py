@@ -0,0 +1,161 @@
+import numpy as np
+
+SEARCH_BATCH = 4096  # Queries scored at a time
+
+
+def _empty_results(n_queries, k):
+    return np.full((n_queries, k), -1, dtype=np.int64), np.full((n_queries, k), -np.inf, dtype=np.float32)
+
+
+def _merge_top_k(best_idx, best_scores, cand_idx, cand_scores, k):
+    """Keep the k highest-scoring of the current best and the new candidates, per query."""
+    idx = np.concatenate([best_idx, cand_idx], axis=1)
+    scores = np.concatenate([best_scores, cand_scores], axis=1)
+    if scores.shape[1] > k:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        idx = np.take_along_axis(idx, part, axis=1)
+        scores = np.take_along_axis(scores, part, axis=1)
+    return idx, scores
+
+
+def _finalize(idx, scores, threshold):
+    """Sort each row by descending score and blank out entries below threshold."""
+    order = np.argsort(-scores, axis=1, kind="stable")
+    idx = np.take_along_axis(idx, order, axis=1)
+    scores = np.take_along_axis(scores, order, axis=1)
+    if threshold is not None:
+        below = scores < threshold
+        idx[below] = -1
+        scores[below] = -np.inf
+    return idx, scores
+
+
+class ExactIndex:
+    """Brute-force cosine-similarity index over L2-normalized vectors."""
+
+    def __init__(self, embeddings: np.ndarray):
+        self.embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.embeddings)
+
+    def search(self, queries: np.ndarray, k: int, threshold: float = None):
+        """
+        Find the k most similar indexed vectors for each query.
+
+        Args:
+            queries: (n, dim) L2-normalized query vectors
+            k: Number of neighbours per query
+            threshold: If given, neighbours below this similarity are dropped
+
+        Returns:
+            tuple: (indices, scores), both (n, k) and sorted by descending score;
+            missing neighbours have index -1 and score -inf
+        """
+        k = max(1, k)
+        best_idx, best_scores = _empty_results(len(queries), k)
+        if len(self) == 0:
+            return best_idx, best_scores
+        for start in range(0, len(queries), SEARCH_BATCH):
+            scores = np.asarray(queries[start:start + SEARCH_BATCH], dtype=np.float32) @ self.embeddings.T
+            idx = np.broadcast_to(np.arange(len(self)), scores.shape)
+            sl = slice(start, start + len(scores))
+            best_idx[sl], best_scores[sl] = _merge_top_k(best_idx[sl], best_scores[sl], idx, scores, k)
+        return _finalize(best_idx, best_scores, threshold)
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate index: vectors are clustered with spherical k-means
+    and a query is only compared with the members of its n_probe closest clusters.
+
+    With n_lists ~ sqrt(N) clusters, each query scores about n_probe * sqrt(N)
+    vectors instead of N.
+    """
+
+    def __init__(self, embeddings: np.ndarray, n_lists: int = None, n_probe: int = 8, n_iter: int = 10, seed: int = 0):
+        self.embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        n = len(self.embeddings)
+        self.n_lists = max(1, min(n, n_lists or int(np.sqrt(n)))) if n else 0
+        self.n_probe = max(1, min(n_probe, self.n_lists)) if n else 0
+        self.centroids, assignments = self._train(n_iter, np.random.default_rng(seed))
+
+        # Members of each list, stored contiguously
+        order = np.argsort(assignments, kind="stable")
+        self.list_members = order
+        self.list_offsets = np.searchsorted(assignments[order], np.arange(self.n_lists + 1))
+
+    def __len__(self) -> int:
+        return len(self.embeddings)
+
+    def _train(self, n_iter, rng):
+        """Spherical k-means: centroids are normalized means of their members."""
+        if not self.n_lists:
+            return np.empty((0, self.embeddings.shape[1]), dtype=np.float32), np.empty(0, dtype=np.int64)
+        centroids = self.embeddings[rng.choice(len(self), self.n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignments = self._assign(centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, self.embeddings)
+            counts = np.bincount(assignments, minlength=self.n_lists)
+            empty = counts == 0
+            # Re-seed empty clusters with random vectors
+            sums[empty] = self.embeddings[rng.choice(len(self), int(empty.sum()))]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+        return centroids.astype(np.float32), self._assign(centroids)
+
+    def _assign(self, centroids):
+        return np.concatenate([
+            np.argmax(self.embeddings[i:i + SEARCH_BATCH] @ centroids.T, axis=1)
+            for i in range(0, len(self), SEARCH_BATCH)
+        ])
+
+    def search(self, queries: np.ndarray, k: int, threshold: float = None):
+        """Approximate counterpart of ExactIndex.search, with the same return format."""
+        k = max(1, k)
+        best_idx, best_scores = _empty_results(len(queries), k)
+        if len(self) == 0:
+            return best_idx, best_scores
+
+        for start in range(0, len(queries), SEARCH_BATCH):
+            batch = np.asarray(queries[start:start + SEARCH_BATCH], dtype=np.float32)
+            sl = slice(start, start + len(batch))
+            probes = np.argpartition(-(batch @ self.centroids.T), self.n_probe - 1, axis=1)[:, :self.n_probe]
+
+            # Score each probed list against all the queries that probe it
+            for lst in np.unique(probes):
+                members = self.list_members[self.list_offsets[lst]:self.list_offsets[lst + 1]]
+                if not len(members):
+                    continue
+                q = np.flatnonzero((probes == lst).any(axis=1))
+                scores = batch[q] @ self.embeddings[members].T
+                idx = np.broadcast_to(members, scores.shape)
+                rows = q + start
+                best_idx[rows], best_scores[rows] = _merge_top_k(best_idx[rows], best_scores[rows], idx, scores, k)
+
+        return _finalize(best_idx, best_scores, threshold)
+
+
+def build_index(kind: str, embeddings: np.ndarray, **kwargs):
+    """Create an 'exact' or 'ivf' index over normalized embeddings."""
+    if kind == "exact":
+        return ExactIndex(embeddings)
+    if kind == "ivf":
+        return IVFIndex(embeddings, **kwargs)
+    raise ValueError(f"Unknown index type: {kind}")
+
+
+def recall(approx_indices: np.ndarray, exact_indices: np.ndarray) -> float:
+    """
+    Fraction of the exact backend's neighbours that the approximate backend also returned.
+
+    Both arguments are search() index arrays for the same queries and k; -1
+    entries (no neighbour above threshold) are ignored.
+    """
+    found = 0
+    total = 0
+    for approx_row, exact_row in zip(approx_indices, exact_indices):
+        exact_set = set(exact_row[exact_row >= 0].tolist())
+        total += len(exact_set)
+        found += len(exact_set.intersection(approx_row[approx_row >= 0].tolist()))
+    return found / total if total else 1.0
@@ -0,0 +1,103 @@
+from typing import Dict, List, Tuple, TypeVar
+
+import numpy as np
+
+from skill_index import build_index
+
+MERGE_THRESHOLD = 0.85  # Minimum cosine similarity for two skill names to be merged
+MERGE_TOP_K = 10  # Nearest names considered per skill
+IVF_MIN_SKILLS = 20000  # Use the approximate index from this many skill names on
+
+T = TypeVar("T")
+
+
+class UnionFind:
+    """Disjoint sets over 0..n-1 with path halving and union by size."""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+
+def cluster_similar(embeddings: np.ndarray, threshold: float = MERGE_THRESHOLD, top_k: int = MERGE_TOP_K) -> List[List[int]]:
+    """
+    Group vectors whose cosine similarity reaches threshold, transitively.
+
+    Each vector is only compared with its top_k nearest neighbours, found with
+    a skill_index index (exact, or IVF for large inputs), so the cost is one
+    batched search rather than a Python loop over all pairs.
+
+    Args:
+        embeddings: (n, dim) L2-normalized embeddings
+        threshold: Minimum cosine similarity for an edge between two vectors
+        top_k: Neighbours considered per vector (including itself)
+
+    Returns:
+        list: Clusters as lists of row indices, each sorted, ordered by their first row
+    """
+    n = len(embeddings)
+    if n == 0:
+        return []
+    index = build_index("ivf" if n >= IVF_MIN_SKILLS else "exact", embeddings)
+    neighbours, _ = index.search(embeddings, min(top_k, n), threshold)
+
+    sets = UnionFind(n)
+    for i, j in zip(*np.nonzero(neighbours >= 0)):
+        sets.union(int(i), int(neighbours[i, j]))
+
+    clusters = {}
+    for i in range(n):
+        clusters.setdefault(sets.find(i), []).append(i)
+    return list(clusters.values())
+
+
+def merge_similar_skills(skills: Dict[str, T], counts: Dict[str, int], names: List[str], embeddings: np.ndarray,
+                         threshold: float = MERGE_THRESHOLD,
+                         top_k: int = MERGE_TOP_K) -> Tuple[Dict[str, T], Dict[str, List[str]]]:
+    """
+    Merge near-duplicate skills into one canonical entry per cluster.
+
+    The canonical entry is the one extracted from the most documents; ties go
+    to the shorter name, then to the one seen first.
+
+    Args:
+        skills: Skills keyed by their normalized name, in first-seen order
+        counts: Number of documents each key was extracted from
+        names: Display name of each skill, in the same order as skills
+        embeddings: L2-normalized embedding of each name, in the same order
+        threshold: Minimum cosine similarity for two names to be merged
+        top_k: Nearest names considered per skill
+
+    Returns:
+        tuple: (merged skills in first-seen order of their canonical entry,
+        aliases mapping each canonical name to the names merged into it)
+    """
+    keys = list(skills)
+    merged = {}
+    aliases = {}
+    for cluster in cluster_similar(embeddings, threshold, top_k):
+        canonical = min(cluster, key=lambda i: (-counts.get(keys[i], 0), len(names[i]), i))
+        merged[keys[canonical]] = skills[keys[canonical]]
+        others = [names[i] for i in cluster if i != canonical]
+        if others:
+            aliases[names[canonical]] = others
+
+    order = {key: i for i, key in enumerate(keys)}
+    merged = dict(sorted(merged.items(), key=lambda item: order[item[0]]))
+    return merged, aliases
+